@@ -0,0 +1,64 @@
+# backtest/engines.py
+
+"""
+Forecasting engines evaluated by the walk-forward backtest.
+
+Each engine takes a training frame with "ds" (tz-naive timestamps) and "y" (closes)
+and returns yhat / yhat_lower / yhat_upper at the requested target timestamps.
+"""
+
+import logging
+from typing import Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Two-sided z-score matching Prophet's default 80% uncertainty interval
+INTERVAL_Z = 1.2816
+TRADING_DAYS_PER_YEAR = 252
+
+
+def prophet_engine(train: pd.DataFrame, targets: List[pd.Timestamp]) -> pd.DataFrame:
+    """
+    The production model (utils.prediction.make_prophet_model), fitted once per origin.
+
+    predict_stock_price forecasts on a fixed grid per horizon; predicting the same
+    fitted model directly at the target timestamps yields the same values there.
+    """
+    from utils.prediction import make_prophet_model
+
+    model = make_prophet_model()
+    model.fit(train[["ds", "y"]])
+    forecast = model.predict(pd.DataFrame({"ds": targets}))
+    return forecast[["yhat", "yhat_lower", "yhat_upper"]].reset_index(drop=True)
+
+
+def _random_walk(train: pd.DataFrame, targets: List[pd.Timestamp], drift: bool) -> pd.DataFrame:
+    log_returns = np.diff(np.log(train["y"].to_numpy(dtype=np.float64)))
+    mu = log_returns.mean() if drift else 0.0
+    sigma = log_returns.std(ddof=1) if len(log_returns) > 1 else 0.0
+    last = float(train["y"].iloc[-1])
+    last_ds = train["ds"].iloc[-1]
+    steps = np.array([(target.normalize() - last_ds.normalize()).days * TRADING_DAYS_PER_YEAR / 365.0 for target in targets])
+    center = last * np.exp(mu * steps)
+    width = np.exp(INTERVAL_Z * sigma * np.sqrt(steps))
+    return pd.DataFrame({"yhat": center, "yhat_lower": center / width, "yhat_upper": center * width})
+
+
+def naive_engine(train: pd.DataFrame, targets: List[pd.Timestamp]) -> pd.DataFrame:
+    """Last close carried forward, with a random-walk interval from daily return volatility."""
+    return _random_walk(train, targets, drift=False)
+
+
+def drift_engine(train: pd.DataFrame, targets: List[pd.Timestamp]) -> pd.DataFrame:
+    """Random walk with the mean daily log return of the training window as drift."""
+    return _random_walk(train, targets, drift=True)
+
+
+ENGINES: Dict[str, Callable[[pd.DataFrame, List[pd.Timestamp]], pd.DataFrame]] = {
+    "prophet": prophet_engine,
+    "naive": naive_engine,
+    "drift": drift_engine,
+}
@@ -0,0 +1,168 @@
+# backtest/run.py
+
+"""
+Walk-forward backtest of forecast accuracy across many symbols.
+
+Every (symbol, engine) pair is evaluated in a worker process over rolling origins
+and checkpointed on completion; re-running the same command resumes where an
+interrupted run stopped. Results are reported per engine, sentiment variant and
+horizon as MAE, MAPE and prediction-interval coverage.
+
+Sentiment variants need historical scores (a CSV with symbol, date and score
+columns, e.g. collected from get_overall_sentiment) and scale forecasts by
+1 + score * factor for each --sentiment-factors value.
+
+Usage:
+    python -m backtest.run [--symbols AAPL MSFT | --limit 50] [--engines prophet naive drift]
+                           [--horizons 1d 1w 1m 3m 6m] [--years 3] [--window 252] [--step 21]
+                           [--sentiment-file scores.csv --sentiment-factors 0.01 0.02]
+                           [--workers 4] [--out data/backtest] [--fresh] [--fixtures] [--json summary.json]
+"""
+
+import os
+import time
+import shutil
+import argparse
+import logging
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from typing import Any, Dict, List
+
+import pandas as pd
+
+from backtest.engines import ENGINES
+from backtest.walk_forward import HORIZONS, Checkpoint, evaluate, load_sentiment, summarize
+
+logger = logging.getLogger(__name__)
+
+FIXTURES_HISTORY_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "benchmarks", "fixtures", "history")
+
+
+def download_history(symbol: str, years: int, path: str) -> bool:
+    import yfinance as yf
+
+    try:
+        hist = yf.Ticker(symbol).history(period=f"{years}y", interval="1d")
+        if hist.empty:
+            logger.warning(f"No history for {symbol}")
+            return False
+        hist.index.name = "Date"
+        hist[["Close"]].to_csv(path)
+        return True
+    except Exception as e:
+        logger.error(f"Error downloading history for {symbol}: {e}")
+        return False
+
+
+def prepare_histories(symbols: List[str], years: int, checkpoint: Checkpoint, fixtures: bool) -> List[str]:
+    """
+    Make sure each symbol's daily history is on disk, downloading concurrently what is missing.
+
+    :return: Symbols with history available
+    """
+    missing = [s for s in symbols if not os.path.exists(checkpoint.history_path(s))]
+    if fixtures:
+        for symbol in missing:
+            source = os.path.join(FIXTURES_HISTORY_DIR, f"{symbol}_1d.csv")
+            if os.path.exists(source):
+                shutil.copyfile(source, checkpoint.history_path(symbol))
+    elif missing:
+        logger.info(f"Downloading {years}y of daily history for {len(missing)} symbols")
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(lambda s: download_history(s, years, checkpoint.history_path(s)), missing))
+    return [s for s in symbols if os.path.exists(checkpoint.history_path(s))]
+
+
+def run(symbols: List[str], engines: List[str], config: Dict[str, Any], out: str, workers: int,
+        years: int, sentiment_file: str = None, fresh: bool = False, fixtures: bool = False) -> List[Dict[str, Any]]:
+    """
+    Run (or resume) the backtest and return every scored forecast.
+
+    :return: List of rows with symbol, engine, variant, origin, horizon, actual, yhat, lower, upper
+    """
+    checkpoint = Checkpoint(out, config, fresh=fresh)
+    symbols = prepare_histories(symbols, years, checkpoint, fixtures)
+    sentiment = load_sentiment(sentiment_file) if sentiment_file else {}
+
+    tasks = [{"symbol": symbol, "engine": engine, "history_path": checkpoint.history_path(symbol),
+              "config": config, "sentiment": sentiment.get(symbol, {}) if sentiment_file else None}
+             for engine in engines for symbol in symbols]
+    pending = [task for task in tasks if not checkpoint.done(task["symbol"], task["engine"])]
+    logger.info(f"{len(tasks)} tasks, {len(tasks) - len(pending)} already checkpointed, running {len(pending)} on {workers} workers")
+
+    start = time.perf_counter()
+    if pending:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(evaluate, task) for task in pending]
+            for completed, future in enumerate(as_completed(futures), 1):
+                result = future.result()
+                if result["error"] is None:
+                    checkpoint.save(result)
+                logger.info(f"[{completed}/{len(pending)}] {result['engine']} {result['symbol']}: "
+                            f"{len(result['rows'])} forecasts in {result['elapsed']:.1f}s"
+                            + (f" (failed: {result['error']})" if result["error"] else ""))
+    logger.info(f"Backtest finished in {time.perf_counter() - start:.1f}s")
+
+    rows = []
+    for task in tasks:
+        result = checkpoint.load(task["symbol"], task["engine"])
+        if result is not None:
+            rows.extend(result["rows"])
+    return rows
+
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--symbols", nargs="+", help="Symbols to evaluate (default: the S&P 500 registry)")
+    parser.add_argument("--limit", type=int, help="Evaluate only the first N symbols")
+    parser.add_argument("--engines", nargs="+", default=list(ENGINES), choices=list(ENGINES))
+    parser.add_argument("--horizons", nargs="+", default=list(HORIZONS), choices=list(HORIZONS))
+    parser.add_argument("--years", type=int, default=3, help="Years of daily history to download")
+    parser.add_argument("--window", type=int, default=252, help="Training window in sessions (the app fits on 1 year)")
+    parser.add_argument("--min-train", type=int, default=None, help="Sessions before the first origin (default: --window)")
+    parser.add_argument("--step", type=int, default=21, help="Sessions between origins")
+    parser.add_argument("--sentiment-file", help="CSV of historical sentiment scores (symbol,date,score)")
+    parser.add_argument("--sentiment-factors", nargs="+", type=float, default=[0.01],
+                        help="Adjustment per sentiment unit to compare (the app uses 0.01)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--out", default=os.path.join("data", "backtest"), help="Checkpoint directory")
+    parser.add_argument("--fresh", action="store_true", help="Discard checkpointed results instead of resuming")
+    parser.add_argument("--fixtures", action="store_true", help="Use the benchmark fixtures instead of downloading")
+    parser.add_argument("--by-symbol", action="store_true", help="Also report metrics per symbol")
+    parser.add_argument("--json", help="Write the summary to this file")
+    args = parser.parse_args(argv)
+
+    symbols = [s.upper() for s in args.symbols] if args.symbols else None
+    if symbols is None:
+        from utils.symbols import registry
+        symbols = list(registry.symbols)
+    if args.limit:
+        symbols = symbols[:args.limit]
+
+    config = {
+        "window": args.window,
+        "min_train": args.min_train or args.window,
+        "step": args.step,
+        "horizons": args.horizons,
+        "sentiment_file": args.sentiment_file,
+        "sentiment_factors": args.sentiment_factors if args.sentiment_file else [],
+    }
+    try:
+        rows = run(symbols, args.engines, config, args.out, args.workers, args.years,
+                   args.sentiment_file, args.fresh, args.fixtures)
+    except ValueError as e:
+        parser.error(str(e))
+
+    with pd.option_context("display.max_rows", None, "display.width", 120, "display.float_format", "{:.3f}".format):
+        print(summarize(rows).to_string(index=False))
+        if args.by_symbol:
+            print()
+            print(summarize(rows, by=["symbol", "engine", "variant", "horizon"]).to_string(index=False))
+    if args.json:
+        summarize(rows).to_json(args.json, orient="records", indent=2)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(name)s: %(message)s")
+    logging.getLogger("cmdstanpy").setLevel(logging.WARNING)
+    logging.getLogger("prophet").setLevel(logging.WARNING)
+    main()
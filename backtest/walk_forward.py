@@ -0,0 +1,189 @@
+# backtest/walk_forward.py
+
+"""
+Rolling-origin (walk-forward) evaluation of forecasting engines.
+
+At every origin an engine is fitted on the preceding window of daily closes and asked
+for the close at each horizon. A horizon's target is the first session on or after
+origin + N calendar days (a weekend or holiday rolls forward, never back to an
+earlier close); the forecast is made for and scored at that session. Sentiment variants scale the forecast the way
+predict_stock_price_with_sentiment does, using the score known at the origin.
+"""
+
+import os
+import json
+import time
+import shutil
+import logging
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from backtest.engines import ENGINES
+from utils.prediction import sentiment_adjustment_factor
+
+logger = logging.getLogger(__name__)
+
+# Horizons in calendar days, matching the forecast periods offered by the API
+HORIZONS = {"1d": 1, "1w": 7, "1m": 30, "3m": 90, "6m": 180}
+
+# A sentiment score older than this at the origin is treated as missing (no adjustment)
+SENTIMENT_MAX_AGE_DAYS = 7
+
+
+def load_history(path: str) -> pd.DataFrame:
+    """
+    Load daily closes saved as a Date/Close CSV.
+
+    :return: DataFrame with "ds" (tz-naive UTC timestamps) and "y" columns, sorted by date
+    """
+    df = pd.read_csv(path)
+    history = pd.DataFrame({
+        "ds": pd.to_datetime(df["Date"], utc=True).dt.tz_localize(None),
+        "y": df["Close"].astype(float),
+    })
+    return history.dropna().sort_values("ds").reset_index(drop=True)
+
+
+def load_sentiment(path: str) -> Dict[str, Dict[str, float]]:
+    """
+    Load historical sentiment scores from a CSV with symbol, date and score columns.
+
+    :return: Dictionary of symbol -> {ISO date: score}
+    """
+    df = pd.read_csv(path)
+    scores: Dict[str, Dict[str, float]] = {}
+    for row in df.itertuples(index=False):
+        scores.setdefault(str(row.symbol).upper(), {})[pd.Timestamp(row.date).date().isoformat()] = float(row.score)
+    return scores
+
+
+def sentiment_at(scores: Dict[str, float], origin: pd.Timestamp) -> float:
+    """Most recent score on or before the origin, or 0 (no adjustment) if none is recent enough."""
+    for age in range(SENTIMENT_MAX_AGE_DAYS + 1):
+        score = scores.get((origin - pd.Timedelta(days=age)).date().isoformat())
+        if score is not None:
+            return score
+    return 0.0
+
+
+def origin_indices(n: int, min_train: int, step: int) -> range:
+    return range(min_train - 1, n - 1, step)
+
+
+def evaluate(task: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Walk-forward evaluation of one engine on one symbol. Runs in a worker process.
+
+    :param task: {"symbol", "engine", "history_path", "config", "sentiment"}
+    :return: {"symbol", "engine", "rows", "elapsed", "error"}
+    """
+    start = time.perf_counter()
+    symbol, engine, config = task["symbol"], task["engine"], task["config"]
+    rows: List[Dict[str, Any]] = []
+    try:
+        history = load_history(task["history_path"])
+        forecast_fn = ENGINES[engine]
+        dates = history["ds"].dt.normalize()
+        for i in origin_indices(len(history), config["min_train"], config["step"]):
+            origin = history["ds"].iloc[i]
+            horizons = []
+            for h in config["horizons"]:
+                j = int(dates.searchsorted(dates.iloc[i] + pd.Timedelta(days=HORIZONS[h]), side="left"))
+                if j < len(history):
+                    horizons.append((h, j))
+            if not horizons:
+                continue
+            train = history.iloc[max(0, i + 1 - config["window"]):i + 1]
+            forecast = forecast_fn(train, [history["ds"].iloc[j] for _, j in horizons])
+            score = sentiment_at(task["sentiment"], origin) if task.get("sentiment") is not None else None
+
+            for (horizon, j), (yhat, lower, upper) in zip(horizons, forecast.itertuples(index=False)):
+                row = {"symbol": symbol, "engine": engine, "origin": origin.date().isoformat(),
+                       "horizon": horizon, "actual": float(history["y"].iloc[j])}
+                rows.append({**row, "variant": "base", "yhat": float(yhat), "lower": float(lower), "upper": float(upper)})
+                if score is not None:
+                    for sensitivity in config["sentiment_factors"]:
+                        factor = sentiment_adjustment_factor(score, sensitivity)
+                        rows.append({**row, "variant": f"sentiment x{sensitivity:g}", "yhat": float(yhat) * factor,
+                                     "lower": float(lower) * factor, "upper": float(upper) * factor})
+        error = None
+    except Exception as e:
+        logger.error(f"Backtest of {engine} on {symbol} failed: {e}")
+        error = str(e)
+    return {"symbol": symbol, "engine": engine, "rows": rows, "elapsed": time.perf_counter() - start, "error": error}
+
+
+def summarize(rows: List[Dict[str, Any]], by: List[str] = ("engine", "variant", "horizon")) -> pd.DataFrame:
+    """
+    Aggregate forecast errors.
+
+    :return: DataFrame with n, MAE, MAPE (%) and interval coverage (%) per group
+    """
+    columns = list(by) + ["n", "mae", "mape", "coverage"]
+    if not rows:
+        return pd.DataFrame(columns=columns)
+    df = pd.DataFrame(rows)
+    error = (df["yhat"] - df["actual"]).abs()
+    df["abs_error"] = error
+    df["pct_error"] = 100.0 * error / df["actual"].abs()
+    df["covered"] = 100.0 * ((df["lower"] <= df["actual"]) & (df["actual"] <= df["upper"]))
+    summary = df.groupby(list(by), sort=False).agg(
+        n=("abs_error", "size"), mae=("abs_error", "mean"), mape=("pct_error", "mean"), coverage=("covered", "mean")
+    ).reset_index()
+    # Order horizons by length rather than alphabetically
+    if "horizon" in by:
+        summary["_order"] = summary["horizon"].map(HORIZONS)
+        summary = summary.sort_values([c for c in by if c != "horizon"] + ["_order"]).drop(columns="_order")
+    return summary.reset_index(drop=True)[columns]
+
+
+class Checkpoint:
+    """
+    On-disk results of completed (symbol, engine) tasks, so interrupted runs resume.
+
+    Layout: <path>/config.json, <path>/history/<SYMBOL>.csv and
+    <path>/results/<engine>/<SYMBOL>.json (one file per task, written atomically).
+    """
+
+    def __init__(self, path: str, config: Dict[str, Any], fresh: bool = False):
+        self.path = path
+        self.config = config
+        if fresh and os.path.exists(os.path.join(path, "results")):
+            shutil.rmtree(os.path.join(path, "results"))
+        os.makedirs(os.path.join(path, "history"), exist_ok=True)
+
+        config_path = os.path.join(path, "config.json")
+        if os.path.exists(config_path) and os.path.exists(os.path.join(path, "results")):
+            with open(config_path, "r") as f:
+                previous = json.load(f)
+            if previous != config:
+                raise ValueError(f"{path} holds results for a different configuration; use --fresh or another --out")
+        self._write_json(config_path, config)
+
+    @staticmethod
+    def _write_json(path: str, data: Any) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    def history_path(self, symbol: str) -> str:
+        return os.path.join(self.path, "history", f"{symbol}.csv")
+
+    def result_path(self, symbol: str, engine: str) -> str:
+        return os.path.join(self.path, "results", engine, f"{symbol}.json")
+
+    def done(self, symbol: str, engine: str) -> bool:
+        return os.path.exists(self.result_path(symbol, engine))
+
+    def save(self, result: Dict[str, Any]) -> None:
+        self._write_json(self.result_path(result["symbol"], result["engine"]), result)
+
+    def load(self, symbol: str, engine: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.result_path(symbol, engine), "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
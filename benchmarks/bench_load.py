@@ -0,0 +1,115 @@
+# benchmarks/bench_load.py
+
+"""
+Offline end-to-end load test of the FastAPI app.
+
+Starts the app under uvicorn on a local port with upstream calls replayed from the
+fixtures, then sweeps client concurrency and reports p50/p99 latency and req/s
+for POST /api/get_stock_data.
+
+Usage:
+    python -m benchmarks.bench_load [--concurrency 1 4 16 64] [--requests 200] [--latency-ms 50] [--cold]
+"""
+
+import time
+import socket
+import asyncio
+import argparse
+import itertools
+import logging
+import threading
+from typing import Dict, List
+
+import httpx
+import uvicorn
+
+from benchmarks.replay import offline, clear_caches, fixture_symbols
+from benchmarks.report import summarize, print_table, write_json
+
+DURATIONS = ["1d", "1w", "1m", "3m", "6m"]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port: int) -> uvicorn.Server:
+    from main import app
+
+    # main configures INFO logging; keep the benchmark output readable
+    logging.getLogger().setLevel(logging.WARNING)
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+async def sweep_level(base_url: str, concurrency: int, total: int, params: Dict) -> Dict:
+    payloads = itertools.cycle(
+        {"symbol": symbol, "duration": duration, "chart_style": "candlestick"}
+        for symbol, duration in itertools.product(fixture_symbols(), DURATIONS)
+    )
+    queue: asyncio.Queue = asyncio.Queue()
+    for _ in range(total):
+        queue.put_nowait(next(payloads))
+
+    latencies: List[float] = []
+    errors = 0
+
+    async def worker(client: httpx.AsyncClient) -> None:
+        nonlocal errors
+        while not queue.empty():
+            payload = queue.get_nowait()
+            start = time.perf_counter()
+            response = await client.post("/api/get_stock_data", json=payload, params=params)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code != 200:
+                errors += 1
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=120.0, limits=limits) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    return {"concurrency": concurrency, **summarize(latencies), "req_per_s": round(total / elapsed, 1), "errors": errors}
+
+
+def run(concurrency_levels: List[int], total: int, latency_ms: float, cold: bool, include_prediction: bool) -> List[Dict]:
+    rows = []
+    with offline(latency_ms=latency_ms):
+        port = free_port()
+        server = start_server(port)
+        try:
+            params = {"include_prediction": "true"} if include_prediction else {}
+            for concurrency in concurrency_levels:
+                if cold:
+                    clear_caches()
+                rows.append(asyncio.run(sweep_level(f"http://127.0.0.1:{port}", concurrency, total, params)))
+        finally:
+            server.should_exit = True
+    return rows
+
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--requests", type=int, default=200, help="Requests per concurrency level")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Simulated upstream round-trip per call")
+    parser.add_argument("--cold", action="store_true", help="Clear caches before each concurrency level")
+    parser.add_argument("--prediction", action="store_true", help="Request include_prediction=true (runs Prophet)")
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args(argv)
+
+    rows = run(args.concurrency, args.requests, args.latency_ms, args.cold, args.prediction)
+    print_table(rows, ["concurrency", "n", "p50_ms", "p99_ms", "mean_ms", "req_per_s", "errors"])
+    if args.json:
+        write_json(args.json, rows)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    main()
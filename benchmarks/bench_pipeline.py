@@ -0,0 +1,85 @@
+# benchmarks/bench_pipeline.py
+
+"""
+Offline micro-benchmarks of the stock-data pipeline stages.
+
+Replays the recorded fixtures through fetch_stock_data (cold and warm cache),
+predict_stock_price, get_overall_sentiment and generate_chart.
+
+Usage:
+    python -m benchmarks.bench_pipeline [--repeat 20] [--latency-ms 0] [--skip-prediction] [--json out.json]
+"""
+
+import time
+import argparse
+import logging
+from typing import Callable, Dict, List
+
+from benchmarks.replay import offline, clear_caches, fixture_symbols, load_json
+from benchmarks.report import summarize, print_table, write_json
+
+DURATIONS = ["1d", "1w", "1m", "3m", "6m"]
+
+
+def measure(func: Callable, repeat: int, setup: Callable = None) -> Dict[str, float]:
+    samples = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+def run(repeat: int, latency_ms: float, include_prediction: bool, stub_sentiment: bool) -> List[Dict]:
+    from utils.data_fetcher import fetch_stock_data, fetch_year_data_for_prediction
+    from utils.prediction import predict_stock_price
+    from utils.sentiment_analysis import get_overall_sentiment
+    from utils.plotter import generate_chart
+
+    rows = []
+    symbol = fixture_symbols()[0]
+    with offline(latency_ms=latency_ms, stub_sentiment=stub_sentiment):
+        for duration in DURATIONS:
+            rows.append({"benchmark": "fetch_stock_data[cold]", "case": duration,
+                         **measure(lambda: fetch_stock_data(symbol, duration), repeat, setup=clear_caches)})
+            rows.append({"benchmark": "fetch_stock_data[warm]", "case": duration,
+                         **measure(lambda: fetch_stock_data(symbol, duration), repeat)})
+
+            stock_data = fetch_stock_data(symbol, duration)
+            for style in ("candlestick", "line"):
+                rows.append({"benchmark": "generate_chart", "case": f"{duration}/{style}",
+                             **measure(lambda: generate_chart(stock_data, style, duration), repeat)})
+
+        articles = load_json("news", symbol)["results"]
+        rows.append({"benchmark": "get_overall_sentiment", "case": f"{len(articles)} articles",
+                     **measure(lambda: get_overall_sentiment(articles), repeat)})
+
+        if include_prediction:
+            year_data = fetch_year_data_for_prediction(symbol)
+            for duration in DURATIONS:
+                # Prophet fits take seconds; a few repetitions are enough
+                rows.append({"benchmark": "predict_stock_price", "case": duration,
+                             **measure(lambda: predict_stock_price(year_data, duration), max(1, repeat // 10))})
+    return rows
+
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Simulated upstream round-trip per call")
+    parser.add_argument("--skip-prediction", action="store_true", help="Skip the slow Prophet benchmarks")
+    parser.add_argument("--finbert", action="store_true", help="Use the real FinBERT model instead of the stub scorer")
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args(argv)
+
+    rows = run(args.repeat, args.latency_ms, not args.skip_prediction, not args.finbert)
+    print_table(rows, ["benchmark", "case", "n", "min_ms", "p50_ms", "p99_ms", "mean_ms"])
+    if args.json:
+        write_json(args.json, rows)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    main()
@@ -0,0 +1,153 @@
+# benchmarks/record_fixtures.py
+
+"""
+Record the market and news fixtures replayed by the offline benchmarks.
+
+By default a deterministic synthetic snapshot is written (seeded random walks on
+real trading-session timestamps), so fixtures can be regenerated anywhere. With
+--live, histories and `info` are recorded from yfinance and news from NewsData.io
+(requires NEWSDATA_API_KEY).
+
+Usage:
+    python -m benchmarks.record_fixtures [--live] [--symbols AAPL MSFT JPM]
+"""
+
+import os
+import json
+import argparse
+import logging
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+DEFAULT_SYMBOLS = ["AAPL", "MSFT", "JPM"]
+
+# interval -> (number of sessions, yfinance period used when recording live)
+INTERVALS = {
+    "5m": (1, "1d"),
+    "15m": (5, "5d"),
+    "1h": (21, "1mo"),
+    "1d": (252, "1y"),
+}
+
+# Last session of the synthetic snapshot
+ANCHOR_DATE = "2024-06-28"
+
+HEADLINES = [
+    ("{name} beats quarterly earnings estimates", "Revenue and margins came in above analyst expectations."),
+    ("{name} shares slip after guidance cut", "The company lowered its full-year outlook citing weaker demand."),
+    ("{name} announces share buyback program", "The board approved a new multi-billion dollar repurchase plan."),
+    ("Analysts upgrade {name} to buy", "Brokers pointed to strong product momentum and pricing power."),
+    ("{name} faces regulatory scrutiny", "Regulators opened an inquiry into the company's business practices."),
+    ("{name} expands into new markets", "The company said it will enter several new regions next year."),
+    ("{name} CEO comments on industry outlook", "Management expects steady growth despite macro uncertainty."),
+    ("{name} stock flat as markets await data", "Investors held positions ahead of key economic releases."),
+    ("{name} reports record sales", "Strong demand drove the best quarter in the company's history."),
+    ("{name} hit by supply chain disruptions", "Component shortages are expected to weigh on near-term output."),
+]
+
+
+def session_index(interval: str, sessions: int) -> pd.DatetimeIndex:
+    days = pd.bdate_range(end=ANCHOR_DATE, periods=sessions, tz="America/New_York")
+    if interval == "1d":
+        return days
+    step = {"5m": "5min", "15m": "15min", "1h": "60min"}[interval]
+    bars = [pd.date_range(day + pd.Timedelta(hours=9, minutes=30), day + pd.Timedelta(hours=15, minutes=59), freq=step)
+            for day in days]
+    return bars[0].append(bars[1:]) if len(bars) > 1 else bars[0]
+
+
+def synthetic_history(symbol: str, interval: str) -> pd.DataFrame:
+    sessions, _ = INTERVALS[interval]
+    index = session_index(interval, sessions)
+    rng = np.random.default_rng(sum(map(ord, symbol)) * 31 + len(interval))
+    vol = 0.015 if interval == "1d" else 0.002
+    start = 50 + (sum(map(ord, symbol)) % 400)
+    close = start * np.exp(np.cumsum(rng.normal(0.0003, vol, len(index))))
+    open_ = np.concatenate([[start], close[:-1]])
+    spread = np.abs(rng.normal(0, vol, len(index))) * close
+    return pd.DataFrame({
+        "Open": open_.round(4),
+        "High": (np.maximum(open_, close) + spread).round(4),
+        "Low": (np.minimum(open_, close) - spread).round(4),
+        "Close": close.round(4),
+        "Volume": rng.integers(10_000, 5_000_000, len(index)),
+    }, index=index.rename("Date"))
+
+
+def synthetic_info(symbol: str, year: pd.DataFrame) -> Dict:
+    return {
+        "longName": f"{symbol} Corporation",
+        "marketCap": int(year["Close"].iloc[-1] * 1e9),
+        "trailingPE": round(15 + sum(map(ord, symbol)) % 20 + 0.5, 2),
+        "dividendYield": 0.012,
+        "fiftyTwoWeekHigh": float(year["High"].max()),
+        "fiftyTwoWeekLow": float(year["Low"].min()),
+    }
+
+
+def synthetic_news(name: str) -> Dict:
+    return {
+        "status": "success",
+        "totalResults": len(HEADLINES),
+        "results": [{"title": title.format(name=name), "description": description} for title, description in HEADLINES],
+    }
+
+
+def record_live(symbol: str) -> None:
+    import yfinance as yf
+    import requests
+
+    ticker = yf.Ticker(symbol)
+    for interval, (_, period) in INTERVALS.items():
+        hist = ticker.history(period=period, interval=interval)
+        hist[["Open", "High", "Low", "Close", "Volume"]].rename_axis("Date").to_csv(history_path(symbol, interval))
+    info = {key: ticker.info.get(key) for key in ("longName", "marketCap", "trailingPE", "dividendYield",
+                                                   "fiftyTwoWeekHigh", "fiftyTwoWeekLow")}
+    write_json(os.path.join(FIXTURES_DIR, "info", f"{symbol}.json"), info)
+
+    response = requests.get("https://newsdata.io/api/1/news", params={
+        "apikey": os.environ["NEWSDATA_API_KEY"], "q": f'"{info["longName"]}"',
+        "language": "en", "category": "business", "size": 10,
+    })
+    response.raise_for_status()
+    write_json(os.path.join(FIXTURES_DIR, "news", f"{symbol}.json"), response.json())
+
+
+def record_synthetic(symbol: str) -> None:
+    for interval in INTERVALS:
+        synthetic_history(symbol, interval).to_csv(history_path(symbol, interval))
+    info = synthetic_info(symbol, synthetic_history(symbol, "1d"))
+    write_json(os.path.join(FIXTURES_DIR, "info", f"{symbol}.json"), info)
+    write_json(os.path.join(FIXTURES_DIR, "news", f"{symbol}.json"), synthetic_news(info["longName"]))
+
+
+def history_path(symbol: str, interval: str) -> str:
+    return os.path.join(FIXTURES_DIR, "history", f"{symbol}_{interval}.csv")
+
+
+def write_json(path: str, data: Dict) -> None:
+    with open(path, "w") as f:
+        json.dump(data, f, indent=1)
+
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--live", action="store_true", help="Record from yfinance and NewsData.io instead of generating")
+    parser.add_argument("--symbols", nargs="+", default=DEFAULT_SYMBOLS)
+    args = parser.parse_args(argv)
+
+    for sub in ("history", "info", "news"):
+        os.makedirs(os.path.join(FIXTURES_DIR, sub), exist_ok=True)
+    for symbol in args.symbols:
+        (record_live if args.live else record_synthetic)(symbol)
+        logger.info(f"Recorded fixtures for {symbol}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(name)s: %(message)s")
+    main()
@@ -0,0 +1,140 @@
+# benchmarks/replay.py
+
+"""
+Offline replay of recorded yfinance, NewsData.io and FinBERT behaviour.
+
+`offline()` patches the upstream clients used by utils/ so the real pipeline code
+runs against the fixtures in benchmarks/fixtures, with an optional simulated
+upstream latency per call.
+"""
+
+import os
+import re
+import json
+import time
+import tempfile
+from contextlib import contextmanager, ExitStack
+from typing import Dict, List
+from unittest import mock
+
+import pandas as pd
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+# Keep fundamentals and symbol persistence out of the working tree while benchmarking
+_state_dir = tempfile.mkdtemp(prefix="rtsp-bench-")
+os.environ.setdefault("FUNDAMENTALS_CACHE_PATH", os.path.join(_state_dir, "fundamentals.json"))
+os.environ.setdefault("SYMBOLS_CACHE_PATH", os.path.join(_state_dir, "sp500_symbols.cache.json"))
+# Only the fixture symbols can be replayed; don't warm the whole universe for the screener
+os.environ.setdefault("SCREENER_WARM_UNIVERSE", "0")
+
+_history: Dict[str, pd.DataFrame] = {}
+
+POSITIVE_WORDS = {"beats", "buyback", "upgrade", "record", "expands", "strong", "growth", "above"}
+NEGATIVE_WORDS = {"slip", "cut", "scrutiny", "disruptions", "shortages", "weaker", "lowered", "weigh"}
+
+
+def fixture_symbols() -> List[str]:
+    return sorted(name[:-len(".json")] for name in os.listdir(os.path.join(FIXTURES_DIR, "info")))
+
+
+def load_history(symbol: str, interval: str) -> pd.DataFrame:
+    key = f"{symbol}_{interval}"
+    if key not in _history:
+        df = pd.read_csv(os.path.join(FIXTURES_DIR, "history", f"{key}.csv"))
+        df.index = pd.DatetimeIndex(pd.to_datetime(df.pop("Date"), utc=True)).tz_convert("America/New_York")
+        _history[key] = df
+    return _history[key]
+
+
+def load_json(kind: str, symbol: str) -> Dict:
+    with open(os.path.join(FIXTURES_DIR, kind, f"{symbol}.json")) as f:
+        return json.load(f)
+
+
+class FixtureTicker:
+    """Stand-in for yfinance.Ticker serving recorded histories and info."""
+
+    latency = 0.0
+
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+
+    def history(self, start=None, end=None, interval: str = "1d", **kwargs) -> pd.DataFrame:
+        time.sleep(self.latency)
+        return load_history(self.symbol, interval).copy()
+
+    @property
+    def info(self) -> Dict:
+        time.sleep(self.latency)
+        return load_json("info", self.symbol)
+
+
+class FixtureResponse:
+    def __init__(self, payload: Dict):
+        self.payload = payload
+        self.content = json.dumps(payload).encode()
+
+    def raise_for_status(self) -> None:
+        pass
+
+    def json(self) -> Dict:
+        return self.payload
+
+
+def fixture_news_get(url: str, params: Dict = None, **kwargs) -> FixtureResponse:
+    time.sleep(FixtureTicker.latency)
+    company_name = (params or {}).get("q", "").strip('"')
+    names = {load_json("info", symbol).get("longName"): symbol for symbol in fixture_symbols()}
+    if company_name not in names:
+        return FixtureResponse({"status": "success", "results": []})
+    return FixtureResponse(load_json("news", names[company_name]))
+
+
+def stub_analyze_sentiment(texts: List[str]) -> List[Dict[str, float]]:
+    """Deterministic lexicon scorer with FinBERT's output shape."""
+    results = []
+    for text in texts:
+        words = set(re.findall(r"[a-z]+", text.lower()))
+        positive = len(words & POSITIVE_WORDS)
+        negative = len(words & NEGATIVE_WORDS)
+        total = positive + negative + 1
+        results.append({"neutral": 1 / total, "positive": positive / total, "negative": negative / total})
+    return results
+
+
+async def skip_symbol_refresh() -> bool:
+    """Keep the bundled symbol snapshot instead of refreshing it from Wikipedia."""
+    return False
+
+
+def clear_caches() -> None:
+    """Drop every in-memory cache so the next call exercises the cold path."""
+    from utils.cache import memory_budget
+    for cache in memory_budget.caches:
+        cache.clear()
+
+
+@contextmanager
+def offline(latency_ms: float = 0.0, stub_sentiment: bool = True):
+    """
+    Patch yfinance, NewsData.io and (optionally) FinBERT with fixture replays, and skip
+    the Wikipedia symbol refresh.
+
+    :param latency_ms: Simulated round-trip time added to every upstream call
+    :param stub_sentiment: Replace FinBERT with the lexicon scorer
+    """
+    import yfinance
+    import utils.news_fetcher
+    import utils.sentiment_analysis
+    import utils.symbols
+
+    FixtureTicker.latency = latency_ms / 1000
+    with ExitStack() as stack:
+        stack.enter_context(mock.patch.object(yfinance, "Ticker", FixtureTicker))
+        stack.enter_context(mock.patch.object(utils.news_fetcher, "NEWSDATA_API_KEY", "offline"))
+        stack.enter_context(mock.patch.object(utils.news_fetcher.requests, "get", fixture_news_get))
+        stack.enter_context(mock.patch.object(utils.symbols, "refresh_symbols", skip_symbol_refresh))
+        if stub_sentiment or utils.sentiment_analysis.model is None:
+            stack.enter_context(mock.patch.object(utils.sentiment_analysis, "analyze_sentiment", stub_analyze_sentiment))
+        yield
@@ -0,0 +1,30 @@
+# benchmarks/report.py
+
+import json
+from typing import Dict, List
+
+import numpy as np
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Summarize latency samples (seconds) as milliseconds."""
+    values = np.asarray(samples) * 1000
+    return {
+        "n": len(values),
+        "min_ms": round(float(values.min()), 3),
+        "p50_ms": round(float(np.percentile(values, 50)), 3),
+        "p99_ms": round(float(np.percentile(values, 99)), 3),
+        "mean_ms": round(float(values.mean()), 3),
+    }
+
+
+def print_table(rows: List[Dict], columns: List[str]) -> None:
+    widths = {col: max(len(col), *(len(str(row.get(col, ""))) for row in rows)) for col in columns}
+    print("  ".join(col.ljust(widths[col]) for col in columns))
+    for row in rows:
+        print("  ".join(str(row.get(col, "")).ljust(widths[col]) for col in columns))
+
+
+def write_json(path: str, rows: List[Dict]) -> None:
+    with open(path, "w") as f:
+        json.dump(rows, f, indent=2)
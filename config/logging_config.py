@@ -1 +1,147 @@
- 
\ No newline at end of file
+# config/logging_config.py
+
+"""
+Non-blocking logging setup.
+
+Records are put on an in-memory queue by a QueueHandler and written by a
+QueueListener thread, so request handlers never wait on console or file I/O.
+Message formatting is deferred to the listener thread as well, and payload dumps
+(records logged with extra={"payload": True}) are sampled before they are queued.
+
+Environment variables:
+    LOG_LEVEL                  Root level (default INFO)
+    LOG_LEVELS                 Per-module levels, e.g. "utils.data_fetcher=DEBUG,yfinance=WARNING"
+    LOG_FORMAT                 "json" (default) or "text"
+    LOG_FILE                   Also write to this file, rotated at 10 MB
+    LOG_PAYLOAD_SAMPLE_RATE    Fraction of payload dumps to keep (default 0.01)
+"""
+
+import os
+import json
+import queue
+import atexit
+import random
+import logging
+import logging.handlers
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+TEXT_FORMAT = "%(asctime)s [%(levelname)s] %(name)s: %(message)s"
+
+# Chatty third-party loggers are quietened unless LOG_LEVELS says otherwise
+DEFAULT_LEVELS = {
+    "cmdstanpy": "WARNING",
+    "prophet": "WARNING",
+    "yfinance": "WARNING",
+    "httpx": "WARNING",
+    "urllib3": "WARNING",
+}
+
+# Attributes present on every LogRecord; anything else came from `extra=` and is emitted as a field
+_RESERVED_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as one JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "thread": record.threadName,
+        }
+        for key, value in vars(record).items():
+            if key not in _RESERVED_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc_info"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class PayloadSampler(logging.Filter):
+    """Keep only a fraction of records marked with extra={"payload": True}."""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if getattr(record, "payload", False):
+            return random.random() < self.rate
+        return True
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that leaves message formatting to the listener thread.
+
+    The stock QueueHandler renders `msg % args` on the calling thread; here only
+    exception tracebacks (which reference live frames) are rendered eagerly.
+    Arguments must therefore not be mutated after they are logged.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def parse_levels(spec: str) -> Dict[str, str]:
+    levels = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, level = item.partition("=")
+        levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def setup_logging() -> None:
+    """
+    Configure the root logger with a queue-based, non-blocking pipeline.
+
+    Safe to call more than once; later calls are no-ops.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    formatter = JsonFormatter() if os.getenv("LOG_FORMAT", "json").lower() == "json" else logging.Formatter(TEXT_FORMAT)
+    handlers = [logging.StreamHandler()]
+    log_file = os.getenv("LOG_FILE")
+    if log_file:
+        handlers.append(logging.handlers.RotatingFileHandler(log_file, maxBytes=10 * 1024 * 1024, backupCount=3))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue: queue.Queue = queue.Queue(-1)
+    queue_handler = DeferredQueueHandler(log_queue)
+    queue_handler.addFilter(PayloadSampler(float(os.getenv("LOG_PAYLOAD_SAMPLE_RATE", "0.01"))))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+
+    levels = dict(DEFAULT_LEVELS)
+    levels.update(parse_levels(os.getenv("LOG_LEVELS", "")))
+    for name, level in levels.items():
+        logging.getLogger(name).setLevel(level)
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
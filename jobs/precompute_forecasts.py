@@ -0,0 +1,140 @@
+# jobs/precompute_forecasts.py
+
+"""
+Precompute forecasts for every symbol and horizon into the shared forecast store.
+
+Forecasts only change when a new daily bar arrives, so this job runs once after the
+market close: Prophet is fitted once per symbol on a process pool, every horizon
+(1d, 1w, 1m, 3m, 6m) is forecast from that fit, and the results are published as a
+memory-mapped snapshot (see utils/forecast_store.py) that all uvicorn workers serve
+from. Symbols missing from the snapshot fall back to a live fit.
+
+Usage:
+    python -m jobs.precompute_forecasts [--symbols AAPL MSFT | --limit 50] [--workers 4]
+                                        [--out data/forecasts] [--daily-at 16:30]
+"""
+
+import os
+import time
+import argparse
+import logging
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+from zoneinfo import ZoneInfo
+
+from utils.forecast_store import FORECAST_STORE_DIR, write_snapshot
+
+logger = logging.getLogger(__name__)
+
+MARKET_TIMEZONE = ZoneInfo("America/New_York")
+# Each horizon is forecast this many days past its end, so a snapshot still covers the full
+# horizon when served from the next sessions (after a weekend or holiday)
+FORECAST_LEAD_DAYS = 4
+
+
+def forecast_symbol(symbol: str) -> Optional[Dict[str, Any]]:
+    """
+    Fit one model for a symbol and forecast every horizon. Runs in a worker process.
+
+    :return: {"symbol", "base_date", "last_close", "forecasts": {horizon: forecast_data}, "periods": {horizon: points}},
+             or None on failure
+    """
+    import pandas as pd
+    from utils.data_fetcher import fetch_year_data_for_prediction
+    from utils.prediction import FORECAST_GRIDS, fit_forecast_model, forecast_with_model
+
+    try:
+        year_data = fetch_year_data_for_prediction(symbol)
+        if len(year_data) < 2:
+            logger.warning(f"Not enough history to forecast {symbol}")
+            return None
+        model, df, _ = fit_forecast_model(year_data)
+    except Exception as e:
+        logger.error(f"Error fitting forecast model for {symbol}: {e}")
+        return None
+
+    forecasts, periods = {}, {}
+    for horizon, (length, freq) in FORECAST_GRIDS.items():
+        try:
+            # Grid points in FORECAST_LEAD_DAYS at this horizon's frequency
+            lead = len(pd.date_range(pd.Timestamp(0), pd.Timestamp(0) + pd.Timedelta(days=FORECAST_LEAD_DAYS), freq=freq)) - 1
+            forecasts[horizon] = forecast_with_model(model, df, horizon, extra_periods=lead)["forecast_data"]
+            periods[horizon] = length
+        except Exception as e:
+            logger.error(f"Error forecasting {horizon} for {symbol}: {e}")
+    return {
+        "symbol": symbol,
+        "base_date": year_data[-1]["Date"][:10],
+        "last_close": year_data[-1]["Close"],
+        "forecasts": forecasts,
+        "periods": periods,
+    }
+
+
+def run(symbols: List[str], workers: int, directory: str) -> Optional[str]:
+    """
+    Forecast all symbols and publish the snapshot.
+
+    :return: Name of the published snapshot, or None if nothing could be forecast
+    """
+    start = time.perf_counter()
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(forecast_symbol, symbol): symbol for symbol in symbols}
+        for completed, future in enumerate(as_completed(futures), 1):
+            result = future.result()
+            if result is not None:
+                results.append(result)
+            if completed % 50 == 0 or completed == len(futures):
+                logger.info(f"Forecast {completed}/{len(futures)} symbols ({len(results)} succeeded)")
+    if not results:
+        logger.error("No forecasts produced; keeping the current snapshot")
+        return None
+    name = write_snapshot(sorted(results, key=lambda r: r["symbol"]), directory)
+    logger.info(f"Precomputed forecasts for {len(results)} symbols in {time.perf_counter() - start:.1f}s")
+    return name
+
+
+def next_run(at: str, now: Optional[datetime] = None) -> datetime:
+    """Next weekday at HH:MM market time, strictly after now."""
+    hour, minute = (int(part) for part in at.split(":"))
+    now = now or datetime.now(MARKET_TIMEZONE)
+    candidate = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    while candidate <= now or candidate.weekday() >= 5:
+        candidate = (candidate + timedelta(days=1)).replace(hour=hour, minute=minute)
+    return candidate
+
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--symbols", nargs="+", help="Symbols to forecast (default: the S&P 500 registry)")
+    parser.add_argument("--limit", type=int, help="Forecast only the first N symbols")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--out", default=FORECAST_STORE_DIR, help="Forecast store directory")
+    parser.add_argument("--daily-at", help="Keep running and rebuild every weekday at HH:MM New York time (e.g. 16:30)")
+    args = parser.parse_args(argv)
+
+    def universe() -> List[str]:
+        if args.symbols:
+            symbols = [s.upper() for s in args.symbols]
+        else:
+            from utils.symbols import registry
+            symbols = list(registry.symbols)
+        return symbols[:args.limit] if args.limit else symbols
+
+    if not args.daily_at:
+        run(universe(), args.workers, args.out)
+        return
+    while True:
+        scheduled = next_run(args.daily_at)
+        logger.info(f"Next forecast run at {scheduled.isoformat()}")
+        time.sleep(max(0.0, (scheduled - datetime.now(MARKET_TIMEZONE)).total_seconds()))
+        run(universe(), args.workers, args.out)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(name)s: %(message)s")
+    logging.getLogger("cmdstanpy").setLevel(logging.WARNING)
+    logging.getLogger("prophet").setLevel(logging.WARNING)
+    main()
@@ -1,6 +1,6 @@
 # main.py
-from fastapi import FastAPI, Request, HTTPException, Query, BackgroundTasks
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi import FastAPI, Request, HTTPException, Query
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
@@ -9,31 +9,37 @@ import os
 import logging
 import asyncio
 import time
-from cachetools import TTLCache
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
 
-from utils.data_fetcher import fetch_stock_data, fetch_year_data_for_prediction
-from utils.prediction import predict_stock_price, predict_stock_price_with_sentiment
+from config.logging_config import setup_logging
+from utils.cache import SizedTTLCache, cache_stats
+from utils.data_fetcher import fetch_stock_data_async, fetch_year_data_for_prediction
+from utils.fundamentals import load_fundamentals, get_fundamentals
+from utils.metrics import (
+    SERVER_TIMING_ENABLED, span, run_in_executor, register_executor, start_request, finish_request,
+    server_timing_header, monitor_event_loop_lag, render_metrics, request_duration, requests_total, forecast_requests
+)
+from utils.prediction import predict_stock_price, adjust_for_sentiment
+from utils.forecast_store import forecast_store
 # from utils.sentiment_analysis import get_stock_sentiment  # Not implemented yet
 from utils.plotter import generate_chart, generate_prediction_chart
-from utils.symbols import get_sp500_symbols, is_valid_symbol
+from utils.symbols import get_sp500_symbols, is_valid_symbol, search_symbols, refresh_symbols_periodically
+from utils.screener import SCREENER_WARM_UNIVERSE, screen, record_forecast, warm_universe_periodically
 from utils.news_fetcher import fetch_news
 from utils.sentiment_analysis import get_overall_sentiment
 
-from utils.schemas import StockDataRequest, StockResponse, SymbolResponse
-
-# Initialize logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
-    handlers=[
-        logging.StreamHandler()
-    ]
+from utils.schemas import (
+    StockDataRequest, StockResponse, SymbolResponse, SymbolSearchResponse, CacheStatsResponse, ScreenerResponse
 )
-logger = logging.getLogger(__name__)
 
 # Load environment variables from .env file
 load_dotenv()
 
+# Initialize logging
+setup_logging()
+logger = logging.getLogger(__name__)
+
 # Initialize FastAPI app
 app = FastAPI()
 
@@ -52,6 +58,48 @@ app.mount("/static", StaticFiles(directory="static"), name="static")
 # Initialize Jinja2 templates
 templates = Jinja2Templates(directory="templates")
 
+# Bounded thread pool for blocking yfinance/news calls made from request handlers
+io_executor = ThreadPoolExecutor(max_workers=int(os.getenv("IO_EXECUTOR_WORKERS", "16")), thread_name_prefix="io")
+register_executor("io", io_executor)
+
+@app.on_event("startup")
+async def load_persisted_caches():
+    # Restore fundamentals persisted by previous runs so price refreshes don't wait on stock.info
+    load_fundamentals()
+    # Symbols are served from the on-disk snapshot; refresh it from Wikipedia in the background
+    asyncio.create_task(refresh_symbols_periodically())
+    # Keep every symbol's daily history cached for the screener
+    if SCREENER_WARM_UNIVERSE:
+        asyncio.create_task(warm_universe_periodically())
+
+@app.on_event("startup")
+async def start_monitoring():
+    asyncio.get_running_loop().set_default_executor(io_executor)
+    asyncio.create_task(monitor_event_loop_lag())
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    token = start_request()
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+    finally:
+        spans = finish_request(token)
+        # Label by route template rather than raw URL to keep the series count bounded
+        route = request.scope.get("route")
+        path = route.path if route is not None else "unmatched"
+        request_duration.observe((request.method, path), time.perf_counter() - start)
+        requests_total.inc((request.method, path, str(status)))
+    if SERVER_TIMING_ENABLED and spans:
+        response.headers["Server-Timing"] = server_timing_header(spans)
+    return response
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
 @app.get("/", response_class=HTMLResponse)
 async def read_root(request: Request):
     return templates.TemplateResponse("index.html", {"request": request})
@@ -63,53 +111,98 @@ async def get_symbols(request: Request):
         raise HTTPException(status_code=500, detail="Unable to fetch stock symbols.")
     return SymbolResponse(symbols=symbols)
 
-# Create a cache for sentiment results (1-hour TTL)
-sentiment_cache = TTLCache(maxsize=100, ttl=3600)
+@app.get("/api/symbols/search", response_model=SymbolSearchResponse)
+async def search_symbol(
+    q: str = Query(..., min_length=1, max_length=64, description="Partial ticker or company name"),
+    limit: int = Query(10, ge=1, le=50, description="Maximum number of results")
+):
+    return SymbolSearchResponse(results=search_symbols(q, limit))
+
+@app.get("/api/screener", response_model=ScreenerResponse)
+async def get_screener(
+    sort: str = Query("return_1d", description="Metric to sort by, e.g. return_1m, volatility, forecast_1m"),
+    order: str = Query("desc", pattern="^(asc|desc)$", description="Sort order"),
+    filter: List[str] = Query([], description="Conditions such as return_1m>5 or volatility<=30"),
+    limit: int = Query(50, ge=1, le=500, description="Maximum number of results")
+):
+    try:
+        return ScreenerResponse(**screen(sort, order == "desc", filter, limit))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+# Create a cache for sentiment results (1-hour TTL, 1 MB)
+sentiment_cache = SizedTTLCache("sentiment", max_bytes=1024 * 1024, ttl=3600)
+
+@app.get("/api/admin/cache", response_model=CacheStatsResponse)
+async def get_cache_stats():
+    return CacheStatsResponse(**cache_stats())
 
 @app.post("/api/get_stock_data", response_model=StockResponse)
 async def get_stock_data(
     request: Request,
     payload: StockDataRequest,
-    background_tasks: BackgroundTasks,
     include_prediction: bool = Query(False, description="Include prediction data"),
     include_sentiment: bool = Query(False, description="Include sentiment analysis")
 ):
+    year_data_task = None
     try:
         symbol = payload.symbol.upper()
         duration = payload.duration
         chart_style = payload.chart_style
         
-        logger.info(f"Requested stock symbol: {symbol}, period: {duration}, include_prediction: {include_prediction}, include_sentiment: {include_sentiment}")
+        logger.info("Requested stock symbol: %s, period: %s, include_prediction: %s, include_sentiment: %s",
+                    symbol, duration, include_prediction, include_sentiment)
 
         if not is_valid_symbol(symbol):
             raise HTTPException(status_code=400, detail="Invalid stock symbol.")
 
-        loop = asyncio.get_event_loop()
-        stock_data = await loop.run_in_executor(None, fetch_stock_data, symbol, duration)
+        # Fan out the independent stages: news + sentiment and the prediction history start
+        # now, while the intraday bars, 1-year history and fundamentals are fetched concurrently
+        start_sentiment(symbol)
+        if include_prediction:
+            year_data_task = asyncio.ensure_future(run_in_executor(None, fetch_year_data_for_prediction, symbol, payload.regressors))
+
+        with span("fetch_stock_data"):
+            stock_data = await fetch_stock_data_async(symbol, duration, indicators=payload.indicators)
         if not stock_data:
             raise HTTPException(status_code=404, detail=f"Stock data not found for symbol: {symbol}")
 
-        main_chart = generate_chart(stock_data, chart_style, duration)
-
-        # Start sentiment analysis in the background if not already cached
-        if symbol not in sentiment_cache:
-            background_tasks.add_task(update_sentiment, symbol, stock_data['company_name'])
+        freshness = stock_data.pop('freshness', None)
+        indicators = stock_data.pop('indicators', None)
+        with span("generate_chart"):
+            main_chart = generate_chart(stock_data, chart_style, duration, indicators)
 
         prediction_chart = None
         forecast = None
         sentiment_result = None
         if include_prediction:
-            year_data = await loop.run_in_executor(None, fetch_year_data_for_prediction, symbol)
-            
+            with span("fetch_year_data"):
+                year_data = await year_data_task
+
+            # Serve the precomputed forecast when it is based on the latest completed daily bar
+            # (the last bar may still be forming), starting after the last bar like a live fit;
+            # fit live only on a miss or with custom regressors
+            prediction_data = None
+            if not payload.regressors and len(year_data) >= 2:
+                with span("forecast_store"):
+                    prediction_data = forecast_store.get(symbol, duration, last_bar=year_data[-1]['Date'],
+                                                         min_base_date=year_data[-2]['Date'][:10])
+            forecast_requests.inc(("snapshot" if prediction_data else "live",))
+            if prediction_data is None:
+                with span("predict"):
+                    prediction_data = predict_stock_price(year_data, duration, payload.regressors)
+                if prediction_data and prediction_data['forecast_data'] and not payload.regressors:
+                    record_forecast(symbol, duration, year_data[-1]['Close'], prediction_data['forecast_data'][-1]['Close'])
+
             if include_sentiment:
                 # Wait for sentiment analysis to complete if it's still running
-                sentiment_result = await wait_for_sentiment(symbol)
-                prediction_data = predict_stock_price_with_sentiment(year_data, duration, symbol, stock_data['company_name'], sentiment_result)
-            else:
-                prediction_data = predict_stock_price(year_data, duration)
+                with span("wait_for_sentiment"):
+                    sentiment_result = await wait_for_sentiment(symbol)
+                prediction_data = adjust_for_sentiment(prediction_data, sentiment_result)
             
             if prediction_data:
-                prediction_chart = generate_prediction_chart(prediction_data, chart_style)
+                with span("generate_prediction_chart"):
+                    prediction_chart = generate_prediction_chart(prediction_data, chart_style)
                 forecast = prediction_data['forecast_data']
 
         response = StockResponse(
@@ -119,28 +212,59 @@ async def get_stock_data(
                 "prediction": prediction_chart
             },
             forecast=forecast,
-            sentiment_result=sentiment_result if include_sentiment else None
+            sentiment_result=sentiment_result if include_sentiment else None,
+            freshness=freshness,
+            indicators=indicators
         )
 
         return response
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Unexpected error in get_stock_data: {str(e)}")
         raise HTTPException(status_code=500, detail=f"An unexpected error occurred: {str(e)}")
+    finally:
+        # Don't leave the prediction history fetch running (or its error unretrieved) when the request fails early
+        if year_data_task is not None:
+            if not year_data_task.done():
+                year_data_task.cancel()
+            elif not year_data_task.cancelled():
+                year_data_task.exception()
 
-async def update_sentiment(symbol: str, company_name: str):
-    articles = fetch_news(symbol, company_name)
-    sentiment_result = get_overall_sentiment(articles) if articles else None
-    if sentiment_result:
-        sentiment_cache[symbol] = sentiment_result
+# In-flight sentiment analyses, so concurrent requests share one news fetch and FinBERT pass
+sentiment_tasks: Dict[str, asyncio.Task] = {}
+
+def start_sentiment(symbol: str) -> Optional[asyncio.Task]:
+    if symbol in sentiment_cache:
+        return None
+    task = sentiment_tasks.get(symbol)
+    if task is None:
+        task = asyncio.ensure_future(update_sentiment(symbol))
+        sentiment_tasks[symbol] = task
+        task.add_done_callback(lambda _: sentiment_tasks.pop(symbol, None))
+    return task
+
+async def update_sentiment(symbol: str):
+    try:
+        fundamentals = await run_in_executor(None, get_fundamentals, symbol)
+        articles = await run_in_executor(None, fetch_news, symbol, fundamentals['company_name'])
+        sentiment_result = await run_in_executor(None, get_overall_sentiment, articles) if articles else None
+        if sentiment_result:
+            sentiment_cache[symbol] = sentiment_result
+        return sentiment_result
+    except Exception as e:
+        logger.error(f"Error updating sentiment for {symbol}: {e}")
+        return None
 
 async def wait_for_sentiment(symbol: str, timeout: int = 10):
-    start_time = time.time()
-    while symbol not in sentiment_cache:
-        if time.time() - start_time > timeout:
-            logger.warning(f"Sentiment analysis timeout for {symbol}")
-            return None
-        await asyncio.sleep(0.5)
-    return sentiment_cache[symbol]
+    if symbol in sentiment_cache:
+        return sentiment_cache[symbol]
+    task = start_sentiment(symbol)
+    try:
+        return await asyncio.wait_for(asyncio.shield(task), timeout)
+    except asyncio.TimeoutError:
+        logger.warning(f"Sentiment analysis timeout for {symbol}")
+        return None
 
 def get_forecast_period(duration: str) -> int:
     duration_map = {
@@ -56,11 +56,26 @@ document.addEventListener('DOMContentLoaded', () => {
         });
     }
 
-    // Filter stock list based on search input
+    // Filter stock list by ticker or company name using the search endpoint
+    let searchTimer = null;
     searchInput.addEventListener('input', () => {
-        const searchTerm = searchInput.value.toUpperCase();
-        const filteredSymbols = allSymbols.filter(symbol => symbol.includes(searchTerm));
-        populateStockList(filteredSymbols);
+        clearTimeout(searchTimer);
+        const searchTerm = searchInput.value.trim();
+        if (!searchTerm) {
+            populateStockList(allSymbols);
+            return;
+        }
+        searchTimer = setTimeout(() => {
+            fetch(`/api/symbols/search?${new URLSearchParams({ q: searchTerm, limit: 50 })}`)
+                .then(response => response.json())
+                .then(data => {
+                    // Ignore responses for a term the user has already changed
+                    if (searchInput.value.trim() === searchTerm) {
+                        populateStockList(data.results.map(result => result.symbol));
+                    }
+                })
+                .catch(error => console.error('Error searching symbols:', error));
+        }, 150);
     });
 
     // Handle stock selection
@@ -0,0 +1,357 @@
+# utils/cache.py
+
+import os
+import sys
+import time
+import logging
+import functools
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from cachetools import TTLCache
+from cachetools.keys import hashkey
+
+logger = logging.getLogger(__name__)
+
+# Global memory budget shared by every registered cache (in megabytes)
+CACHE_MEMORY_BUDGET_MB = int(os.getenv("CACHE_MEMORY_BUDGET_MB", "256"))
+
+# How long expired entries may still be served while they are revalidated (in seconds)
+STALE_GRACE_SECONDS = int(os.getenv("STALE_GRACE_SECONDS", "900"))
+
+BAR_COLUMNS = ("Open", "High", "Low", "Close", "Volume")
+
+
+class CompactBars:
+    """
+    OHLCV bars stored as NumPy columns instead of a list of dicts.
+
+    Timestamps are kept as int64 nanoseconds since the epoch (UTC) together with
+    the original timezone name, prices as float32 and volume as int64.
+    """
+
+    __slots__ = ("timestamps", "tz", "open", "high", "low", "close", "volume")
+
+    def __init__(self, timestamps: np.ndarray, tz: Optional[str], open: np.ndarray, high: np.ndarray,
+                 low: np.ndarray, close: np.ndarray, volume: np.ndarray):
+        self.timestamps = timestamps
+        self.tz = tz
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+
+    @classmethod
+    def from_history(cls, hist: pd.DataFrame) -> "CompactBars":
+        """
+        Build compact bars from a yfinance history DataFrame.
+
+        :param hist: DataFrame indexed by timestamp with Open/High/Low/Close/Volume columns
+        :return: CompactBars instance
+        """
+        index = pd.DatetimeIndex(hist.index)
+        tz = str(index.tz) if index.tz is not None else None
+        if tz is not None:
+            index = index.tz_convert("UTC")
+        return cls(
+            timestamps=index.values.astype("datetime64[ns]").view(np.int64),
+            tz=tz,
+            open=hist["Open"].to_numpy(dtype=np.float32),
+            high=hist["High"].to_numpy(dtype=np.float32),
+            low=hist["Low"].to_numpy(dtype=np.float32),
+            close=hist["Close"].to_numpy(dtype=np.float32),
+            volume=np.nan_to_num(hist["Volume"].to_numpy(dtype=np.float64)).astype(np.int64),
+        )
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(getattr(self, name).nbytes for name in ("timestamps", "open", "high", "low", "close", "volume"))
+
+    def index(self) -> pd.DatetimeIndex:
+        """Return the bar timestamps as a DatetimeIndex in the original timezone."""
+        if self.tz is None:
+            return pd.DatetimeIndex(self.timestamps.view("datetime64[ns]"))
+        return pd.DatetimeIndex(self.timestamps.view("datetime64[ns]")).tz_localize("UTC").tz_convert(self.tz)
+
+    def column(self, name: str) -> np.ndarray:
+        return getattr(self, name.lower())
+
+    def _column_values(self, name: str) -> List[Any]:
+        values = self.column(name)
+        if values.dtype == np.float32:
+            # Round away float32 noise so prices serialize as e.g. 189.46 rather than 189.4600067
+            values = values.astype(np.float64).round(4)
+        return values.tolist()
+
+    def to_records(self, columns: Sequence[str] = BAR_COLUMNS) -> List[Dict[str, Any]]:
+        """
+        Expand the bars into the list-of-dicts shape returned by the API.
+
+        :param columns: Bar columns to include next to "Date"
+        :return: List of dictionaries, one per bar
+        """
+        dates = [ts.isoformat() for ts in self.index()]
+        values = [self._column_values(name) for name in columns]
+        return [dict(zip(("Date",) + tuple(columns), row)) for row in zip(dates, *values)]
+
+
+def payload_size(value: Any) -> int:
+    """
+    Estimate the memory footprint of a cached value in bytes.
+
+    NumPy arrays and objects exposing `nbytes` (CompactBars, indicator state) count
+    their buffers; containers are walked recursively.
+    """
+    if isinstance(value, np.ndarray):
+        return sys.getsizeof(value) + (0 if value.base is not None else value.nbytes)
+    if hasattr(type(value), "nbytes"):
+        return sys.getsizeof(value) + value.nbytes
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(payload_size(k) + payload_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + sum(payload_size(item) for item in value)
+    return sys.getsizeof(value)
+
+
+class MemoryBudget:
+    """Global byte budget enforced across all registered SizedTTLCache instances."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.caches: List["SizedTTLCache"] = []
+        self.lock = threading.RLock()
+
+    def register(self, cache: "SizedTTLCache") -> None:
+        with self.lock:
+            self.caches.append(cache)
+
+    @property
+    def currsize(self) -> int:
+        return sum(cache.currsize for cache in self.caches)
+
+    def enforce(self) -> None:
+        """Evict least recently used entries from the largest caches until the budget is met."""
+        with self.lock:
+            while self.currsize > self.max_bytes:
+                candidates = [cache for cache in self.caches if len(cache)]
+                if not candidates:
+                    break
+                largest = max(candidates, key=lambda cache: cache.currsize)
+                key, _ = largest.popitem()
+                logger.debug(f"Memory budget exceeded, evicted {key} from {largest.name}")
+
+
+memory_budget = MemoryBudget(CACHE_MEMORY_BUDGET_MB * 1024 * 1024)
+
+
+class SizedTTLCache(TTLCache):
+    """
+    TTLCache whose maxsize is a byte budget, with hit/miss/eviction counters.
+
+    Entries are weighted with payload_size and every insert is checked against
+    the global memory budget.
+    """
+
+    def __init__(self, name: str, max_bytes: int, ttl: float, budget: MemoryBudget = memory_budget):
+        super().__init__(maxsize=max_bytes, ttl=ttl, getsizeof=payload_size)
+        self.name = name
+        self.budget = budget
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self.evictions = 0
+        budget.register(self)
+
+    # Reads reorder the LRU/TTL links, so they take the budget lock like writes and evictions
+    def __getitem__(self, key):
+        with self.budget.lock:
+            try:
+                value = super().__getitem__(key)
+            except KeyError:
+                self.misses += 1
+                raise
+            self.hits += 1
+            return value
+
+    def __contains__(self, key):
+        with self.budget.lock:
+            return super().__contains__(key)
+
+    def get(self, key, default=None):
+        # A single read: the entry may expire or be evicted between a membership test and the read
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __setitem__(self, key, value):
+        with self.budget.lock:
+            super().__setitem__(key, value)
+        self.budget.enforce()
+
+    def popitem(self):
+        # TTLCache.popitem reads the evicted value through __getitem__; don't count that as a hit
+        with self.budget.lock:
+            hits = self.hits
+            item = super().popitem()
+            self.hits = hits
+            self.evictions += 1
+            return item
+
+    def peek(self, key, default=None):
+        """Return a live entry without affecting the hit/miss counters."""
+        with self.budget.lock:
+            hits, misses = self.hits, self.misses
+            value = self.get(key, default)
+            self.hits, self.misses = hits, misses
+            return value
+
+    def snapshot(self) -> Dict[Any, Any]:
+        """Return a copy of the live entries without affecting the hit/miss counters."""
+        with self.budget.lock:
+            hits, misses = self.hits, self.misses
+            entries = dict(self.items())
+            self.hits, self.misses = hits, misses
+        return entries
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self),
+            "bytes": self.currsize,
+            "max_bytes": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale_hits": self.stale_hits,
+            "evictions": self.evictions,
+        }
+
+
+def cache_stats() -> Dict[str, Any]:
+    """
+    Report entries, bytes, hit/miss and eviction counts for every registered cache.
+
+    :return: Dictionary with the global budget and per-cache statistics
+    """
+    with memory_budget.lock:
+        return {
+            "budget_bytes": memory_budget.max_bytes,
+            "used_bytes": memory_budget.currsize,
+            "caches": {cache.name: cache.stats() for cache in memory_budget.caches},
+        }
+
+
+revalidate_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="revalidate")
+
+
+class CacheLookup(NamedTuple):
+    value: Any
+    fetched_at: float
+    stale: bool
+
+    def freshness(self) -> Dict[str, Any]:
+        return {
+            "status": "stale" if self.stale else "fresh",
+            "age_seconds": round(max(0.0, time.time() - self.fetched_at), 1),
+            "fetched_at": datetime.fromtimestamp(self.fetched_at, tz=timezone.utc).isoformat(),
+        }
+
+
+def stale_while_revalidate(cache: SizedTTLCache, ttl: float, on_store: Optional[Callable[[Any, Any], None]] = None) -> Callable:
+    """
+    Cache a function's results with stale-while-revalidate semantics.
+
+    Results younger than `ttl` are fresh. Older results are returned immediately and
+    refreshed in the background until the cache's own TTL evicts them, so the cache
+    should be created with ttl + STALE_GRACE_SECONDS. A failed refresh (None result)
+    keeps serving the stale value (stale-if-error). Only a cold miss blocks the caller,
+    and concurrent cold misses for the same key share a single upstream call.
+
+    The wrapped function gains a `lookup` method returning a CacheLookup (or None), and
+    a `prefetch` method that refreshes an entry on the caller's thread (for background
+    warmers, which must not queue behind or ahead of user-triggered revalidations).
+
+    :param cache: Cache holding (value, fetched_at) pairs
+    :param ttl: Age in seconds after which a cached value is considered stale
+    :param on_store: Called with (key, value) after a refreshed value is cached
+    """
+    def decorator(func: Callable) -> Callable:
+        inflight: Dict[Any, Future] = {}
+        lock = threading.Lock()
+
+        def claim(key) -> Tuple[Future, bool]:
+            """Return the in-flight call for key, and whether the caller must run it."""
+            with lock:
+                if key in inflight:
+                    return inflight[key], False
+                future = inflight[key] = Future()
+                return future, True
+
+        def refresh(key, args, kwargs, future: Future):
+            try:
+                value = func(*args, **kwargs)
+                if value is not None:
+                    cache[key] = (value, time.time())
+                    if on_store is not None:
+                        on_store(key, value)
+                else:
+                    logger.warning(f"Refresh of {func.__name__}{args} failed, keeping previous value if any")
+                future.set_result(value)
+            except BaseException as e:
+                future.set_exception(e)
+            finally:
+                with lock:
+                    inflight.pop(key, None)
+
+        def lookup(*args, **kwargs) -> Optional[CacheLookup]:
+            key = hashkey(*args, **kwargs)
+            entry = cache.get(key)
+            # Entries restored from disk keep their original fetched_at but restart the cache's
+            # own timer, so the cache TTL is enforced against fetched_at as well
+            if entry is not None and time.time() - entry[1] <= cache.ttl:
+                value, fetched_at = entry
+                if time.time() - fetched_at <= ttl:
+                    return CacheLookup(value, fetched_at, False)
+                cache.stale_hits += 1
+                future, owner = claim(key)
+                if owner:
+                    revalidate_executor.submit(refresh, key, args, kwargs, future)
+                return CacheLookup(value, fetched_at, True)
+
+            future, owner = claim(key)
+            if owner:
+                refresh(key, args, kwargs, future)
+            value = future.result()
+            return CacheLookup(value, time.time(), False) if value is not None else None
+
+        def prefetch(*args, max_age: float = 0.0, **kwargs) -> bool:
+            """Refresh the entry unless it is younger than max_age. Returns whether a refresh ran."""
+            key = hashkey(*args, **kwargs)
+            entry = cache.peek(key)
+            if entry is not None and time.time() - entry[1] < max_age:
+                return False
+            future, owner = claim(key)
+            if owner:
+                refresh(key, args, kwargs, future)
+            future.result()
+            return owner
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            result = lookup(*args, **kwargs)
+            return result.value if result is not None else None
+
+        wrapper.lookup = lookup
+        wrapper.prefetch = prefetch
+        wrapper.cache = cache
+        return wrapper
+
+    return decorator
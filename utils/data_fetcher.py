@@ -3,18 +3,27 @@
 import yfinance as yf
 import pandas as pd
 import numpy as np
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Sequence
 import logging
-from cachetools import TTLCache, cached
+import asyncio
+from concurrent.futures import Executor
 from datetime import datetime, timedelta
 
+from utils.cache import SizedTTLCache, CompactBars, CacheLookup, STALE_GRACE_SECONDS, stale_while_revalidate
+from utils.fundamentals import get_fundamentals
+from utils.indicators import indicator_engine, expand_groups
+from utils.metrics import span, run_in_executor
+
 logger = logging.getLogger(__name__)
 
-# Cache for general stock data (5 minutes TTL)
-stock_data_cache = TTLCache(maxsize=100, ttl=300)
+STOCK_DATA_TTL = 300
+YEAR_DATA_TTL = 3600
+
+# Cache for general stock data (5 minutes TTL plus stale grace window, 64 MB)
+stock_data_cache = SizedTTLCache("stock_data", max_bytes=64 * 1024 * 1024, ttl=STOCK_DATA_TTL + STALE_GRACE_SECONDS)
 
-# Cache for 1-year historical data (1 hour TTL)
-year_data_cache = TTLCache(maxsize=100, ttl=3600)
+# Cache for 1-year historical data (1 hour TTL plus stale grace window, 64 MB)
+year_data_cache = SizedTTLCache("year_data", max_bytes=64 * 1024 * 1024, ttl=YEAR_DATA_TTL + STALE_GRACE_SECONDS)
 
 def convert_numpy_types(obj):
     if isinstance(obj, np.integer):
@@ -25,8 +34,14 @@ def convert_numpy_types(obj):
         return obj.tolist()
     return obj
 
-@cached(stock_data_cache)
-def fetch_stock_data(symbol: str, period: str = "1d") -> Optional[Dict[str, Any]]:
+@stale_while_revalidate(stock_data_cache, ttl=STOCK_DATA_TTL)
+def fetch_stock_snapshot(symbol: str, period: str = "1d") -> Optional[Dict[str, Any]]:
+    """
+    Fetch and cache stock data in compact form.
+
+    Historical bars are kept as CompactBars; the 1-year data and fundamentals are
+    not embedded so they are only held once, in their own caches.
+    """
     logger.info(f"Fetching stock data for symbol: {symbol}, period: {period}")
     try:
         stock = yf.Ticker(symbol)
@@ -53,40 +68,25 @@ def fetch_stock_data(symbol: str, period: str = "1d") -> Optional[Dict[str, Any]
             interval = "5m"
 
         # Fetch historical data
-        hist = stock.history(start=start_date, end=end_date, interval=interval)
-        
-        logger.info(f"Fetched data shape: {hist.shape}")
-        logger.info(f"Date range: from {hist.index.min()} to {hist.index.max()}")
-        logger.info(f"Number of unique dates: {hist.index.nunique()}")
-        logger.info(f"Data points: {len(hist)}")
-        logger.info(f"Columns: {hist.columns}")
-        logger.info(f"First few rows:\n{hist.head()}")
-        logger.info(f"Last few rows:\n{hist.tail()}")
+        with span("yfinance_history"):
+            hist = stock.history(start=start_date, end=end_date, interval=interval)
         
-        info = stock.info
-
-        historical_data = []
-        for date, row in hist.iterrows():
-            historical_data.append({
-                "Date": date.isoformat(),
-                "Open": convert_numpy_types(row['Open']),
-                "High": convert_numpy_types(row['High']),
-                "Low": convert_numpy_types(row['Low']),
-                "Close": convert_numpy_types(row['Close']),
-                "Volume": convert_numpy_types(row['Volume'])
-            })
+        logger.info("Fetched %d data points for %s (%s)", len(hist), symbol, interval)
+        if logger.isEnabledFor(logging.DEBUG):
+            # Payload dumps are sampled and rendered on the logging thread (see config/logging_config.py)
+            logger.debug("Date range: from %s to %s, unique dates: %d, columns: %s",
+                         hist.index.min(), hist.index.max(), hist.index.nunique(), list(hist.columns),
+                         extra={"payload": True})
+            logger.debug("First few rows:\n%s\nLast few rows:\n%s", hist.head(), hist.tail(),
+                         extra={"payload": True})
 
         previous_close = convert_numpy_types(hist['Close'].iloc[-2] if len(hist) > 1 else None)
         current_price = convert_numpy_types(hist['Close'].iloc[-1])
         change = convert_numpy_types(current_price - previous_close if previous_close is not None else None)
         change_percent = convert_numpy_types((change / previous_close * 100) if previous_close is not None and previous_close != 0 else None)
 
-        # Fetch 1-year data separately and cache it
-        full_year_data = fetch_year_data(symbol)
-        
         data = {
             "symbol": symbol,
-            "company_name": info.get('longName', 'N/A'),
             "current_price": current_price,
             "change": change,
             "change_percent": change_percent,
@@ -95,13 +95,7 @@ def fetch_stock_data(symbol: str, period: str = "1d") -> Optional[Dict[str, Any]
             "high": convert_numpy_types(hist['High'].iloc[-1]),
             "low": convert_numpy_types(hist['Low'].iloc[-1]),
             "volume": convert_numpy_types(hist['Volume'].iloc[-1]),
-            "market_cap": convert_numpy_types(info.get('marketCap', 'N/A')),
-            "pe_ratio": convert_numpy_types(info.get('trailingPE', 'N/A')),
-            "dividend_yield": convert_numpy_types(info.get('dividendYield', 'N/A')),
-            "fifty_two_week_high": convert_numpy_types(info.get('fiftyTwoWeekHigh', 'N/A')),
-            "fifty_two_week_low": convert_numpy_types(info.get('fiftyTwoWeekLow', 'N/A')),
-            "historical_data": historical_data,
-            "full_year_data": full_year_data
+            "bars": CompactBars.from_history(hist)
         }
         
         logger.info(f"Successfully fetched data for symbol: {symbol}")
@@ -110,46 +104,107 @@ def fetch_stock_data(symbol: str, period: str = "1d") -> Optional[Dict[str, Any]
         logger.error(f"Error fetching data for symbol {symbol}: {e}")
         return None
 
-@cached(year_data_cache)
-def fetch_year_data(symbol: str) -> List[Dict[str, Any]]:
+def assemble_stock_data(snapshot: Optional[CacheLookup], year_bars: Optional[CacheLookup], fundamentals: Dict[str, Any],
+                        indicators: Optional[Dict[str, List[Optional[float]]]] = None) -> Optional[Dict[str, Any]]:
+    """
+    Assemble the stock data payload from the quote, 1-year and fundamentals stages.
+
+    The "freshness" entry reports the status and age of the quote and 1-year data;
+    "indicators" (when requested) holds series aligned with historical_data.
+    """
+    if snapshot is None:
+        return None
+
+    data = {key: value for key, value in snapshot.value.items() if key != "bars"}
+    data.update(fundamentals)
+    data["historical_data"] = snapshot.value["bars"].to_records()
+    data["full_year_data"] = year_bars.value.to_records() if year_bars is not None else []
+    data["freshness"] = {
+        "quote": snapshot.freshness(),
+        "year_data": year_bars.freshness() if year_bars is not None else None
+    }
+    if indicators is not None:
+        data["indicators"] = indicators
+    return data
+
+def snapshot_indicators(symbol: str, period: str, snapshot: Optional[CacheLookup], groups: Sequence[str]) -> Optional[Dict[str, List[Optional[float]]]]:
+    """
+    Compute the requested indicator groups over the cached bars of a snapshot.
+
+    State is kept per (symbol, period), so a refreshed snapshot only replays its new tail.
+    """
+    if not groups or snapshot is None:
+        return None
+    return indicator_engine.compute(f"{symbol}:{period}", snapshot.value["bars"], expand_groups(groups))
+
+def fetch_stock_data(symbol: str, period: str = "1d", indicators: Sequence[str] = ()) -> Optional[Dict[str, Any]]:
+    """
+    Fetch stock data from the quote, fundamentals and 1-year caches, one after another.
+
+    Stale cached values are served while they are refreshed in the background.
+    """
+    snapshot = fetch_stock_snapshot.lookup(symbol, period)
+    return assemble_stock_data(
+        snapshot,
+        fetch_year_bars.lookup(symbol),
+        get_fundamentals(symbol),
+        snapshot_indicators(symbol, period, snapshot, indicators)
+    )
+
+async def fetch_stock_data_async(symbol: str, period: str = "1d", executor: Optional[Executor] = None,
+                                 indicators: Sequence[str] = ()) -> Optional[Dict[str, Any]]:
+    """
+    Fetch stock data with the intraday bars, 1-year history and fundamentals stages
+    running concurrently on the given executor (the loop's default when None).
+
+    A cold request therefore costs the slowest upstream call rather than their sum.
+    """
+    snapshot, year_bars, fundamentals = await asyncio.gather(
+        run_in_executor(executor, fetch_stock_snapshot.lookup, symbol, period),
+        run_in_executor(executor, fetch_year_bars.lookup, symbol),
+        run_in_executor(executor, get_fundamentals, symbol)
+    )
+    with span("indicators"):
+        series = snapshot_indicators(symbol, period, snapshot, indicators)
+    return assemble_stock_data(snapshot, year_bars, fundamentals, series)
+
+@stale_while_revalidate(year_data_cache, ttl=YEAR_DATA_TTL)
+def fetch_year_bars(symbol: str) -> Optional[CompactBars]:
     logger.info(f"Fetching 1-year data for symbol: {symbol}")
     try:
         stock = yf.Ticker(symbol)
         end_date = datetime.now()
         start_date = end_date - timedelta(days=365)
-        hist = stock.history(start=start_date, end=end_date, interval="1d")
-        
-        return [
-            {
-                "Date": date.isoformat(),
-                "Open": convert_numpy_types(row['Open']),
-                "High": convert_numpy_types(row['High']),
-                "Low": convert_numpy_types(row['Low']),
-                "Close": convert_numpy_types(row['Close']),
-                "Volume": convert_numpy_types(row['Volume'])
-            }
-            for date, row in hist.iterrows()
-        ]
+        with span("yfinance_year_history"):
+            hist = stock.history(start=start_date, end=end_date, interval="1d")
+        if hist.empty:
+            # yfinance's answer for "no data / possibly delisted"; keep serving the previous history if any
+            logger.warning(f"No 1-year data returned for symbol: {symbol}")
+            return None
+        return CompactBars.from_history(hist)
     except Exception as e:
         logger.error(f"Error fetching 1-year data for symbol {symbol}: {e}")
-        return []
+        return None
 
-@cached(year_data_cache)
-def fetch_year_data_for_prediction(symbol: str) -> List[Dict[str, Any]]:
-    logger.info(f"Fetching 1-year data for prediction, symbol: {symbol}")
-    try:
-        stock = yf.Ticker(symbol)
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=365)
-        hist = stock.history(start=start_date, end=end_date, interval="1d")
-        
-        return [
-            {
-                "Date": date.isoformat(),
-                "Close": convert_numpy_types(row['Close'])
-            }
-            for date, row in hist.iterrows()
-        ]
-    except Exception as e:
-        logger.error(f"Error fetching 1-year data for symbol {symbol}: {e}")
+def fetch_year_data(symbol: str) -> List[Dict[str, Any]]:
+    bars = fetch_year_bars(symbol)
+    return bars.to_records() if bars is not None else []
+
+def fetch_year_data_for_prediction(symbol: str, regressors: Sequence[str] = ()) -> List[Dict[str, Any]]:
+    """
+    Get the 1-year closes used for prediction, optionally with indicator series as extra columns.
+
+    :param symbol: Stock symbol (e.g., 'AAPL')
+    :param regressors: Indicator series names (e.g., 'rsi_14') to add to each record
+    :return: List of {"Date", "Close", <regressor>...} dictionaries
+    """
+    bars = fetch_year_bars(symbol)
+    if bars is None:
         return []
+    records = bars.to_records(columns=("Close",))
+    if regressors:
+        series = indicator_engine.compute(f"{symbol}:1y", bars, regressors)
+        for name, values in series.items():
+            for record, value in zip(records, values):
+                record[name] = value
+    return records
@@ -0,0 +1,195 @@
+# utils/forecast_store.py
+
+"""
+Read-only store of precomputed forecasts, shared by every worker through mmap.
+
+A snapshot is two files written by the batch job (jobs/precompute_forecasts.py):
+    forecasts-<stamp>.npy    structured array of forecast points (ts, open, high, low, close)
+    forecasts-<stamp>.json   index: per symbol the base bar date, last close and, per
+                             horizon, the [offset, length, periods] slice into the array
+Each horizon is stored with some lead past its end; a lookup returns the `periods` points
+after the request's last bar, so the window matches a live fit made on that bar.
+A CURRENT file names the active snapshot and is replaced atomically, so readers
+switch to a new snapshot without ever seeing a partial one.
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+FORECAST_STORE_DIR = os.getenv("FORECAST_STORE_DIR", os.path.join("data", "forecasts"))
+# How often readers check CURRENT for a newer snapshot (in seconds)
+FORECAST_STORE_RELOAD_INTERVAL = float(os.getenv("FORECAST_STORE_RELOAD_INTERVAL", "30"))
+# Snapshots kept on disk after a new one is published
+FORECAST_STORE_KEEP = 2
+
+FORECAST_DTYPE = np.dtype([("ts", "<i8"), ("open", "<f4"), ("high", "<f4"), ("low", "<f4"), ("close", "<f4")])
+
+
+class Snapshot:
+    """A loaded snapshot: the memory-mapped forecast points and their index."""
+
+    __slots__ = ("name", "points", "index")
+
+    def __init__(self, name: str, points: np.ndarray, index: Dict[str, Any]):
+        self.name = name
+        self.points = points
+        self.index = index
+
+    @classmethod
+    def open(cls, directory: str, name: str) -> "Snapshot":
+        points = np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r")
+        with open(os.path.join(directory, f"{name}.json"), "r") as f:
+            index = json.load(f)
+        return cls(name, points, index)
+
+
+class ForecastStore:
+    """
+    Serve forecasts from the current snapshot, reloading when a new one is published.
+
+    Lookups slice the memory-mapped array (no copy); only the requested horizon is
+    materialized into the API's list-of-dicts shape.
+    """
+
+    def __init__(self, directory: str = FORECAST_STORE_DIR, reload_interval: float = FORECAST_STORE_RELOAD_INTERVAL):
+        self.directory = directory
+        self.reload_interval = reload_interval
+        self.snapshot: Optional[Snapshot] = None
+        self.checked_at = 0.0
+        self.lock = threading.Lock()
+
+    def current(self) -> Optional[Snapshot]:
+        """Return the active snapshot, checking CURRENT at most every reload_interval seconds."""
+        if time.time() - self.checked_at < self.reload_interval:
+            return self.snapshot
+        with self.lock:
+            if time.time() - self.checked_at < self.reload_interval:
+                return self.snapshot
+            self.checked_at = time.time()
+            try:
+                with open(os.path.join(self.directory, "CURRENT"), "r") as f:
+                    name = f.read().strip()
+                if self.snapshot is None or name != self.snapshot.name:
+                    self.snapshot = Snapshot.open(self.directory, name)
+                    logger.info(f"Loaded forecast snapshot {name} with {len(self.snapshot.index['entries'])} symbols")
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logger.error(f"Error loading forecast snapshot from {self.directory}: {e}")
+            return self.snapshot
+
+    def get(self, symbol: str, horizon: str, last_bar: Optional[str] = None,
+            min_base_date: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Look up a precomputed forecast.
+
+        :param symbol: Stock symbol
+        :param horizon: Forecast period ('1d', '1w', '1m', '3m' or '6m')
+        :param last_bar: Timestamp (ISO) of the request's last daily bar; only points after it are returned
+        :param min_base_date: Oldest acceptable last-bar date (YYYY-MM-DD) the forecast may be based on
+        :return: {"forecast_data": [...]} as returned by predict_stock_price, or None on a miss
+                 (including when the stored points no longer cover the horizon after last_bar)
+        """
+        snapshot = self.current()
+        if snapshot is None:
+            return None
+        entry = snapshot.index["entries"].get(symbol)
+        if entry is None or horizon not in entry["horizons"]:
+            return None
+        if min_base_date is not None and entry["base_date"] < min_base_date:
+            return None
+
+        offset, length, periods = entry["horizons"][horizon]
+        points = snapshot.points[offset:offset + length]
+        if last_bar is not None:
+            ts = pd.Timestamp(last_bar)
+            if ts.tzinfo is not None:
+                ts = ts.tz_convert("UTC").tz_localize(None)
+            points = points[int(np.searchsorted(points["ts"], ts.value, side="right")):]
+        if len(points) < periods:
+            return None
+        points = points[:periods]
+        dates = np.datetime_as_string(points["ts"].view("datetime64[ns]"), unit="s").tolist()
+        columns = [points[name].astype(np.float64).round(4).tolist() for name in ("open", "high", "low", "close")]
+        return {
+            "forecast_data": [
+                {"Date": date, "Open": o, "High": h, "Low": l, "Close": c, "Volume": None}
+                for date, o, h, l, c in zip(dates, *columns)
+            ]
+        }
+
+    def deltas(self) -> Dict[Tuple[str, str], Tuple[float, float]]:
+        """(generated_at, forecast change in % vs. the last close) at the end of each horizon, for the screener."""
+        snapshot = self.current()
+        if snapshot is None:
+            return {}
+        generated_at = snapshot.index["generated_at"]
+        result = {}
+        for symbol, entry in snapshot.index["entries"].items():
+            for horizon, (offset, length, periods) in entry["horizons"].items():
+                if periods and length >= periods and entry["last_close"]:
+                    final = float(snapshot.points["close"][offset + periods - 1])
+                    result[(symbol, horizon)] = (generated_at, 100.0 * (final / entry["last_close"] - 1.0))
+        return result
+
+
+def write_snapshot(results: List[Dict[str, Any]], directory: str = FORECAST_STORE_DIR) -> str:
+    """
+    Write a snapshot and publish it as CURRENT.
+
+    :param results: Per symbol {"symbol", "base_date", "last_close", "forecasts": {horizon: forecast_data},
+                    "periods": {horizon: points in the horizon}} (periods defaults to all points)
+    :param directory: Store directory
+    :return: Name of the published snapshot
+    """
+    os.makedirs(directory, exist_ok=True)
+    name = f"forecasts-{time.strftime('%Y%m%dT%H%M%S')}"
+
+    total = sum(len(data) for result in results for data in result["forecasts"].values())
+    points = np.empty(total, dtype=FORECAST_DTYPE)
+    entries: Dict[str, Any] = {}
+    offset = 0
+    for result in results:
+        horizons = {}
+        for horizon, data in result["forecasts"].items():
+            end = offset + len(data)
+            block = points[offset:end]
+            block["ts"] = np.array([row["Date"] for row in data], dtype="datetime64[ns]").view(np.int64)
+            for column in ("Open", "High", "Low", "Close"):
+                block[column.lower()] = [row[column] for row in data]
+            horizons[horizon] = [offset, len(data), result.get("periods", {}).get(horizon, len(data))]
+            offset = end
+        entries[result["symbol"]] = {"base_date": result["base_date"], "last_close": result["last_close"], "horizons": horizons}
+
+    index = {"generated_at": time.time(), "points": total, "entries": entries}
+    np.save(os.path.join(directory, f"{name}.npy"), points)
+    with open(os.path.join(directory, f"{name}.json"), "w") as f:
+        json.dump(index, f)
+
+    tmp_path = os.path.join(directory, "CURRENT.tmp")
+    with open(tmp_path, "w") as f:
+        f.write(name)
+    os.replace(tmp_path, os.path.join(directory, "CURRENT"))
+    logger.info(f"Published forecast snapshot {name}: {len(entries)} symbols, {total} points, {points.nbytes} bytes")
+
+    # Readers still mapping an older snapshot keep their mapping after the file is unlinked
+    snapshots = sorted(f[:-5] for f in os.listdir(directory) if f.startswith("forecasts-") and f.endswith(".json"))
+    for old in snapshots[:-FORECAST_STORE_KEEP]:
+        for suffix in (".npy", ".json"):
+            try:
+                os.remove(os.path.join(directory, old + suffix))
+            except FileNotFoundError:
+                pass
+    return name
+
+
+forecast_store = ForecastStore()
@@ -0,0 +1,115 @@
+# utils/fundamentals.py
+
+import os
+import json
+import time
+import logging
+import threading
+from typing import Dict, Any, Optional
+
+import yfinance as yf
+from cachetools.keys import hashkey
+
+from utils.cache import SizedTTLCache, stale_while_revalidate
+from utils.metrics import span
+
+logger = logging.getLogger(__name__)
+
+# Fundamentals change at most daily: keep them for a day and refresh in the background
+# once an entry is older than FUNDAMENTALS_REFRESH_AFTER, so hot symbols never expire.
+FUNDAMENTALS_TTL = 86400
+FUNDAMENTALS_REFRESH_AFTER = 20 * 3600
+FUNDAMENTALS_CACHE_PATH = os.getenv("FUNDAMENTALS_CACHE_PATH", os.path.join("data", "fundamentals.json"))
+
+# Mapping of response fields to yfinance `info` keys
+FUNDAMENTAL_FIELDS = {
+    "company_name": "longName",
+    "market_cap": "marketCap",
+    "pe_ratio": "trailingPE",
+    "dividend_yield": "dividendYield",
+    "fifty_two_week_high": "fiftyTwoWeekHigh",
+    "fifty_two_week_low": "fiftyTwoWeekLow",
+}
+
+fundamentals_cache = SizedTTLCache("fundamentals", max_bytes=4 * 1024 * 1024, ttl=FUNDAMENTALS_TTL)
+
+_save_lock = threading.Lock()
+
+
+def save_fundamentals(path: str = FUNDAMENTALS_CACHE_PATH) -> None:
+    """
+    Persist the fundamentals cache to disk, replacing the file atomically.
+
+    :param path: Path of the JSON snapshot
+    """
+    entries = {key[0]: {"fetched_at": fetched_at, "data": data}
+               for key, (data, fetched_at) in fundamentals_cache.snapshot().items()}
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with _save_lock:
+            with open(tmp_path, "w") as f:
+                json.dump(entries, f)
+            os.replace(tmp_path, path)
+    except Exception as e:
+        logger.error(f"Error saving fundamentals to {path}: {e}")
+
+
+@stale_while_revalidate(fundamentals_cache, ttl=FUNDAMENTALS_REFRESH_AFTER, on_store=lambda key, value: save_fundamentals())
+def fetch_fundamentals(symbol: str) -> Optional[Dict[str, Any]]:
+    """
+    Fetch fundamentals for a symbol from yfinance's `info` endpoint.
+
+    :param symbol: Stock symbol (e.g., 'AAPL')
+    :return: Dictionary of fundamentals, or None on failure
+    """
+    logger.info(f"Fetching fundamentals for symbol: {symbol}")
+    try:
+        with span("yfinance_info"):
+            info = yf.Ticker(symbol).info
+        return {field: info.get(key, 'N/A') for field, key in FUNDAMENTAL_FIELDS.items()}
+    except Exception as e:
+        logger.error(f"Error fetching fundamentals for symbol {symbol}: {e}")
+        return None
+
+
+def get_fundamentals(symbol: str) -> Dict[str, Any]:
+    """
+    Get fundamentals for a symbol from the daily cache.
+
+    Entries older than FUNDAMENTALS_REFRESH_AFTER are served as-is and refreshed in the
+    background. Only a symbol that has never been seen (or expired) blocks on yfinance.
+
+    :param symbol: Stock symbol (e.g., 'AAPL')
+    :return: Dictionary of fundamentals, with 'N/A' values when unavailable
+    """
+    data = fetch_fundamentals(symbol)
+    if data is None:
+        return {field: 'N/A' for field in FUNDAMENTAL_FIELDS}
+    return data
+
+
+def load_fundamentals(path: str = FUNDAMENTALS_CACHE_PATH) -> int:
+    """
+    Load persisted fundamentals from disk into the cache, skipping entries older than the TTL.
+
+    :param path: Path of the JSON snapshot
+    :return: Number of entries loaded
+    """
+    if not os.path.exists(path):
+        return 0
+    try:
+        with open(path, "r") as f:
+            entries = json.load(f)
+    except Exception as e:
+        logger.error(f"Error loading fundamentals from {path}: {e}")
+        return 0
+
+    now = time.time()
+    loaded = 0
+    for symbol, entry in entries.items():
+        if now - entry.get("fetched_at", 0) < FUNDAMENTALS_TTL:
+            fundamentals_cache[hashkey(symbol)] = (entry["data"], entry["fetched_at"])
+            loaded += 1
+    logger.info(f"Loaded fundamentals for {loaded} symbols from {path}")
+    return loaded
@@ -0,0 +1,323 @@
+# utils/indicators.py
+
+import logging
+import threading
+from collections import deque
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from utils.cache import SizedTTLCache, CompactBars
+
+logger = logging.getLogger(__name__)
+
+SMA_PERIODS = (20, 50)
+EMA_PERIODS = (12, 26)
+RSI_PERIOD = 14
+MACD_FAST, MACD_SLOW, MACD_SIGNAL = 12, 26, 9
+BOLLINGER_PERIOD, BOLLINGER_WIDTH = 20, 2.0
+WINDOW = max(SMA_PERIODS + (BOLLINGER_PERIOD,))
+
+# Requestable indicators and the series each one produces
+INDICATOR_GROUPS = {
+    "sma_20": ("sma_20",),
+    "sma_50": ("sma_50",),
+    "ema_12": ("ema_12",),
+    "ema_26": ("ema_26",),
+    "rsi": ("rsi_14",),
+    "macd": ("macd", "macd_signal", "macd_hist"),
+    "bollinger": ("bb_upper", "bb_middle", "bb_lower"),
+    "vwap": ("vwap",),
+}
+SERIES_NAMES = tuple(name for names in INDICATOR_GROUPS.values() for name in names)
+
+# Series drawn on the price axis; the rest are oscillators with their own panel
+PRICE_OVERLAYS = {"sma_20", "sma_50", "ema_12", "ema_26", "bb_upper", "bb_middle", "bb_lower", "vwap"}
+
+# Bars needed before a series is meaningful; earlier values are reported as NaN
+WARMUP = {
+    "sma_20": 20, "sma_50": 50, "ema_12": 12, "ema_26": 26, "rsi_14": RSI_PERIOD + 1,
+    "macd": MACD_SLOW, "macd_signal": MACD_SLOW + MACD_SIGNAL - 1, "macd_hist": MACD_SLOW + MACD_SIGNAL - 1,
+    "bb_upper": BOLLINGER_PERIOD, "bb_middle": BOLLINGER_PERIOD, "bb_lower": BOLLINGER_PERIOD, "vwap": 1,
+}
+
+
+def expand_groups(groups: Sequence[str]) -> List[str]:
+    """Map requested indicator groups (e.g. 'macd') to their series names."""
+    return [name for group in groups for name in INDICATOR_GROUPS[group]]
+
+
+def _ewm(x: np.ndarray, alpha: float) -> np.ndarray:
+    # Recursive EMA seeded with the first value (y[0] = x[0]), matching the incremental update
+    return pd.Series(x).ewm(alpha=alpha, adjust=False).mean().to_numpy()
+
+
+def _rolling_mean(x: np.ndarray, n: int) -> np.ndarray:
+    out = np.full(len(x), np.nan)
+    if len(x) >= n:
+        csum = np.concatenate(([0.0], np.cumsum(x)))
+        out[n - 1:] = (csum[n:] - csum[:-n]) / n
+    return out
+
+
+def _rolling_std(x: np.ndarray, n: int) -> np.ndarray:
+    mean = _rolling_mean(x, n)
+    var = _rolling_mean(x * x, n) - mean * mean
+    return np.sqrt(np.clip(var, 0.0, None))
+
+
+def _is_intraday(timestamps: np.ndarray) -> bool:
+    return len(timestamps) > 1 and np.median(np.diff(timestamps)) < 86_400 * 10 ** 9
+
+
+def _session_keys(bars: CompactBars) -> np.ndarray:
+    """Session (calendar day in the exchange timezone) of each bar; daily bars share one anchored session."""
+    if not _is_intraday(bars.timestamps):
+        return np.zeros(len(bars), dtype=np.int64)
+    return bars.index().normalize().as_unit("ns").asi8
+
+
+def compute_all(bars: CompactBars) -> Dict[str, np.ndarray]:
+    """
+    Compute every indicator series over the bars with vectorized operations.
+
+    Values are raw (no warm-up masking) so they can seed incremental state.
+
+    :param bars: Compact OHLCV bars
+    :return: Dictionary of float64 arrays aligned with the bars
+    """
+    close = bars.close.astype(np.float64)
+    out: Dict[str, np.ndarray] = {}
+
+    for n in SMA_PERIODS:
+        out[f"sma_{n}"] = _rolling_mean(close, n)
+    for n in EMA_PERIODS:
+        out[f"ema_{n}"] = _ewm(close, 2.0 / (n + 1))
+
+    delta = np.diff(close, prepend=close[:1])
+    avg_gain = _ewm(np.clip(delta, 0.0, None), 1.0 / RSI_PERIOD)
+    avg_loss = _ewm(np.clip(-delta, 0.0, None), 1.0 / RSI_PERIOD)
+    out["avg_gain"], out["avg_loss"] = avg_gain, avg_loss
+    out["rsi_14"] = _rsi(avg_gain, avg_loss)
+
+    macd = _ewm(close, 2.0 / (MACD_FAST + 1)) - _ewm(close, 2.0 / (MACD_SLOW + 1))
+    signal = _ewm(macd, 2.0 / (MACD_SIGNAL + 1))
+    out["macd"], out["macd_signal"], out["macd_hist"] = macd, signal, macd - signal
+
+    middle = _rolling_mean(close, BOLLINGER_PERIOD)
+    width = BOLLINGER_WIDTH * _rolling_std(close, BOLLINGER_PERIOD)
+    out["bb_middle"], out["bb_upper"], out["bb_lower"] = middle, middle + width, middle - width
+
+    typical = (bars.high.astype(np.float64) + bars.low.astype(np.float64) + close) / 3.0
+    volume = bars.volume.astype(np.float64)
+    sessions = _session_keys(bars)
+    pv, v = np.cumsum(typical * volume), np.cumsum(volume)
+    # Reset the running sums at each session start by subtracting the totals before it
+    starts = np.flatnonzero(np.diff(sessions, prepend=sessions[:1] - 1))
+    offsets = np.repeat(np.concatenate(([0.0], pv[starts[1:] - 1])), np.diff(np.append(starts, len(pv))))
+    v_offsets = np.repeat(np.concatenate(([0.0], v[starts[1:] - 1])), np.diff(np.append(starts, len(v))))
+    out["cum_pv"], out["cum_v"] = pv - offsets, v - v_offsets
+    with np.errstate(invalid="ignore", divide="ignore"):
+        out["vwap"] = np.where(out["cum_v"] > 0, out["cum_pv"] / out["cum_v"], typical)
+    return out
+
+
+def _rsi(avg_gain, avg_loss):
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(avg_loss > 0, 100.0 - 100.0 / (1.0 + avg_gain / avg_loss), 100.0)
+
+
+class IndicatorState:
+    """
+    Running indicator state after the last committed bar.
+
+    EMA, MACD and RSI state advance in O(1) per bar; SMA and Bollinger use a fixed
+    window of the last WINDOW closes, and VWAP keeps per-session running sums.
+    """
+
+    __slots__ = ("timestamps", "values", "count", "close", "ema", "avg_gain", "avg_loss", "macd_signal",
+                 "window", "session", "cum_pv", "cum_v", "intraday")
+
+    def __init__(self):
+        self.timestamps = np.empty(0, dtype=np.int64)
+        self.values: Dict[str, np.ndarray] = {}
+        self.count = 0
+        self.close = 0.0
+        self.ema: Dict[int, float] = {}
+        self.avg_gain = 0.0
+        self.avg_loss = 0.0
+        self.macd_signal = 0.0
+        self.window = deque(maxlen=WINDOW)
+        self.session = 0
+        self.cum_pv = 0.0
+        self.cum_v = 0.0
+        self.intraday = False
+
+    @property
+    def nbytes(self) -> int:
+        return self.timestamps.nbytes + sum(values.nbytes for values in self.values.values()) + 8 * WINDOW
+
+    @classmethod
+    def from_arrays(cls, bars: CompactBars, values: Dict[str, np.ndarray], upto: int) -> "IndicatorState":
+        """Build the state as of bar index `upto` from a full vectorized computation."""
+        state = cls()
+        close = bars.close.astype(np.float64)
+        state.count = upto + 1
+        state.close = float(close[upto])
+        state.ema = {n: float(values[f"ema_{n}"][upto]) for n in set(EMA_PERIODS) | {MACD_FAST, MACD_SLOW}}
+        state.avg_gain = float(values["avg_gain"][upto])
+        state.avg_loss = float(values["avg_loss"][upto])
+        state.macd_signal = float(values["macd_signal"][upto])
+        state.window.extend(close[max(0, upto + 1 - WINDOW):upto + 1].tolist())
+        state.intraday = _is_intraday(bars.timestamps)
+        state.session = int(_session_keys(bars)[upto])
+        state.cum_pv = float(values["cum_pv"][upto])
+        state.cum_v = float(values["cum_v"][upto])
+        return state
+
+    def copy(self) -> "IndicatorState":
+        clone = IndicatorState()
+        for name in self.__slots__:
+            setattr(clone, name, getattr(self, name))
+        clone.ema = dict(self.ema)
+        clone.window = deque(self.window, maxlen=WINDOW)
+        return clone
+
+    def step(self, timestamp: int, high: float, low: float, close: float, volume: float, tz: Optional[str]) -> Dict[str, float]:
+        """Advance the state by one bar and return the raw indicator values for it."""
+        delta = close - self.close if self.count else 0.0
+        for n in self.ema:
+            alpha = 2.0 / (n + 1)
+            self.ema[n] = close if not self.count else self.ema[n] + alpha * (close - self.ema[n])
+        alpha = 1.0 / RSI_PERIOD
+        gain, loss = max(delta, 0.0), max(-delta, 0.0)
+        self.avg_gain = gain if not self.count else self.avg_gain + alpha * (gain - self.avg_gain)
+        self.avg_loss = loss if not self.count else self.avg_loss + alpha * (loss - self.avg_loss)
+        macd = self.ema[MACD_FAST] - self.ema[MACD_SLOW]
+        alpha = 2.0 / (MACD_SIGNAL + 1)
+        self.macd_signal = macd if not self.count else self.macd_signal + alpha * (macd - self.macd_signal)
+
+        self.window.append(close)
+        window = np.fromiter(self.window, dtype=np.float64)
+
+        session = 0
+        if self.intraday:
+            session = pd.Timestamp(timestamp, tz="UTC").tz_convert(tz).normalize().value if tz else timestamp - timestamp % 86_400_000_000_000
+        if session != self.session:
+            self.session, self.cum_pv, self.cum_v = session, 0.0, 0.0
+        typical = (high + low + close) / 3.0
+        self.cum_pv += typical * volume
+        self.cum_v += volume
+
+        self.close = close
+        self.count += 1
+
+        values = {f"ema_{n}": self.ema[n] for n in EMA_PERIODS}
+        for n in SMA_PERIODS:
+            values[f"sma_{n}"] = window[-n:].mean() if len(window) >= n else np.nan
+        values["rsi_14"] = float(_rsi(np.float64(self.avg_gain), np.float64(self.avg_loss)))
+        values["macd"], values["macd_signal"], values["macd_hist"] = macd, self.macd_signal, macd - self.macd_signal
+        if len(window) >= BOLLINGER_PERIOD:
+            recent = window[-BOLLINGER_PERIOD:]
+            middle, width = recent.mean(), BOLLINGER_WIDTH * recent.std()
+            values["bb_middle"], values["bb_upper"], values["bb_lower"] = middle, middle + width, middle - width
+        else:
+            values["bb_middle"] = values["bb_upper"] = values["bb_lower"] = np.nan
+        values["vwap"] = self.cum_pv / self.cum_v if self.cum_v > 0 else typical
+        return values
+
+
+class IndicatorEngine:
+    """
+    Per-series indicator cache that updates incrementally as cached bars refresh.
+
+    The last bar of a series may still be forming, so state is committed only up to
+    the second-to-last bar; a refresh that appends bars replays from there over the new
+    tail. A refresh whose window has scrolled forward is recomputed from scratch: the
+    recursive indicators (EMA, RSI, MACD) and daily VWAP depend on the first bar, so
+    reusing older state would make the series depend on the process's cache history
+    rather than on the bars returned. Cached state is advanced in place, so each series
+    is updated under its own lock.
+    """
+
+    def __init__(self, cache: SizedTTLCache):
+        self.cache = cache
+        self.locks: Dict[str, threading.Lock] = {}
+        self.locks_guard = threading.Lock()
+
+    def _lock(self, key: str) -> threading.Lock:
+        with self.locks_guard:
+            return self.locks.setdefault(key, threading.Lock())
+
+    def compute(self, key: str, bars: CompactBars, names: Sequence[str] = SERIES_NAMES) -> Dict[str, List[Optional[float]]]:
+        """
+        Indicator series for the bars, reusing and advancing any state held for `key`.
+
+        :param key: Identifies the series, e.g. "AAPL:1d"
+        :param bars: Compact OHLCV bars (typically straight from the data_fetcher caches)
+        :param names: Series names to return (see SERIES_NAMES)
+        :return: Dictionary of lists aligned with the bars, None during warm-up
+        """
+        if not len(bars):
+            return {name: [] for name in names}
+
+        with self._lock(key):
+            state = self.cache.get(key)
+            values = self._advance(state, bars) if state is not None else None
+            if values is not None:
+                # Re-insert so the cache re-measures the grown state
+                self.cache[key] = state
+            if values is None:
+                values = self._full(key, bars)
+
+        result = {}
+        for name in names:
+            series = values[name].round(4)
+            series[:WARMUP[name] - 1] = np.nan
+            result[name] = [None if v != v else v for v in series.tolist()]
+        return result
+
+    def _full(self, key: str, bars: CompactBars) -> Dict[str, np.ndarray]:
+        raw = compute_all(bars)
+        values = {name: raw[name] for name in SERIES_NAMES}
+        if len(bars) > 1:
+            state = IndicatorState.from_arrays(bars, raw, len(bars) - 2)
+            state.timestamps = bars.timestamps[:-1].copy()
+            state.values = {name: series[:-1].copy() for name, series in values.items()}
+            self.cache[key] = state
+        return values
+
+    def _advance(self, state: IndicatorState, bars: CompactBars) -> Optional[Dict[str, np.ndarray]]:
+        ts = bars.timestamps
+        committed = state.timestamps
+        # The new bars must start where the committed history starts and extend it
+        end = len(committed)
+        if not end or end > len(ts) or not np.array_equal(committed, ts[:end]):
+            return None
+        if abs(float(bars.close[end - 1]) - state.close) > 1e-6 * max(1.0, abs(state.close)):
+            # History was revised (e.g. dividend adjustment); recompute from scratch
+            return None
+
+        history = {name: state.values[name] for name in SERIES_NAMES}
+        tail = {name: np.empty(len(ts) - end) for name in SERIES_NAMES}
+        working = state
+        for j, i in enumerate(range(end, len(ts))):
+            if i == len(ts) - 1:
+                # Commit everything before the still-forming last bar and replay it on a copy
+                self._commit(state, ts[end:i], {name: values[:j] for name, values in tail.items()})
+                working = state.copy()
+            step = working.step(int(ts[i]), float(bars.high[i]), float(bars.low[i]), float(bars.close[i]),
+                                float(bars.volume[i]), bars.tz)
+            for name in SERIES_NAMES:
+                tail[name][j] = step[name]
+        return {name: np.concatenate((history[name], tail[name])) for name in SERIES_NAMES}
+
+    def _commit(self, state: IndicatorState, timestamps: np.ndarray, values: Dict[str, np.ndarray]) -> None:
+        state.timestamps = np.concatenate((state.timestamps, timestamps))
+        state.values = {name: np.concatenate((state.values[name], values[name])) for name in state.values}
+
+
+# Indicator state per (symbol, period) series, sized like the other caches
+indicator_cache = SizedTTLCache("indicators", max_bytes=32 * 1024 * 1024, ttl=86400)
+indicator_engine = IndicatorEngine(indicator_cache)
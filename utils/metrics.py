@@ -0,0 +1,200 @@
+# utils/metrics.py
+
+import os
+import time
+import asyncio
+import logging
+import functools
+import threading
+import contextvars
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from utils.cache import cache_stats, revalidate_executor
+
+logger = logging.getLogger(__name__)
+
+# Add a Server-Timing header with the per-stage durations to every response
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "false").lower() in ("1", "true", "yes")
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Spans recorded for the current request, used to build the Server-Timing header
+_request_spans: contextvars.ContextVar[Optional[List[Tuple[str, float]]]] = contextvars.ContextVar("request_spans", default=None)
+
+
+class Histogram:
+    """Cumulative Prometheus-style histogram keyed by a label tuple."""
+
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...], buckets: Tuple[float, ...] = BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self.series: Dict[Tuple[str, ...], List[float]] = {}
+        self.lock = threading.Lock()
+
+    def observe(self, labels: Tuple[str, ...], value: float) -> None:
+        with self.lock:
+            # Layout: one counter per bucket, then +Inf count, then sum
+            series = self.series.setdefault(labels, [0.0] * (len(self.buckets) + 2))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += 1
+            series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            for labels, series in sorted(self.series.items()):
+                base = _format_labels(self.label_names, labels)
+                bounds = [str(bound) for bound in self.buckets] + ["+Inf"]
+                for bound, count in zip(bounds, series):
+                    lines.append(f"{self.name}_bucket{_join_labels(base, bound)} {int(count)}")
+                lines.append(f"{self.name}_count{{{base}}} {int(series[-2])}")
+                lines.append(f"{self.name}_sum{{{base}}} {series[-1]}")
+        return lines
+
+
+class Counter:
+    """Monotonic counter keyed by a label tuple."""
+
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...]):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.series: Dict[Tuple[str, ...], float] = {}
+        self.lock = threading.Lock()
+
+    def inc(self, labels: Tuple[str, ...], amount: float = 1.0) -> None:
+        with self.lock:
+            self.series[labels] = self.series.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self.lock:
+            for labels, value in sorted(self.series.items()):
+                lines.append(f"{self.name}{{{_format_labels(self.label_names, labels)}}} {value}")
+        return lines
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...]) -> str:
+    return ",".join(f'{name}="{value}"' for name, value in zip(names, values))
+
+
+def _join_labels(base: str, bound: str) -> str:
+    le = f'le="{bound}"'
+    return "{" + (f"{base},{le}" if base else le) + "}"
+
+
+stage_duration = Histogram("rtsp_stage_duration_seconds", "Time spent in each pipeline stage.", ("stage",))
+request_duration = Histogram("rtsp_http_request_duration_seconds", "HTTP request latency.", ("method", "path"))
+requests_total = Counter("rtsp_http_requests_total", "HTTP requests by status code.", ("method", "path", "status"))
+forecast_requests = Counter("rtsp_forecast_requests_total", "Forecasts served from the precomputed store or fitted live.", ("source",))
+event_loop_lag = Histogram("rtsp_event_loop_lag_seconds", "Delay of a periodic event-loop tick beyond its schedule.", (),
+                           buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0))
+
+_executors: Dict[str, ThreadPoolExecutor] = {"revalidate": revalidate_executor}
+_last_loop_lag = 0.0
+
+
+@contextmanager
+def span(stage: str):
+    """
+    Time a block of code as a named pipeline stage.
+
+    The duration is recorded in the stage histogram and, when running inside a
+    request, in that request's Server-Timing entries.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        stage_duration.observe((stage,), elapsed)
+        spans = _request_spans.get()
+        if spans is not None:
+            spans.append((stage, elapsed))
+
+
+async def run_in_executor(executor: Optional[ThreadPoolExecutor], func: Callable, *args: Any) -> Any:
+    """loop.run_in_executor that carries the request context, so spans in worker threads are attributed to it."""
+    context = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(executor, functools.partial(context.run, func, *args))
+
+
+def register_executor(name: str, executor: ThreadPoolExecutor) -> None:
+    """Report the queue depth of a thread pool on /metrics."""
+    _executors[name] = executor
+
+
+def start_request() -> contextvars.Token:
+    return _request_spans.set([])
+
+
+def finish_request(token: contextvars.Token) -> List[Tuple[str, float]]:
+    spans = _request_spans.get() or []
+    _request_spans.reset(token)
+    return spans
+
+
+def server_timing_header(spans: List[Tuple[str, float]]) -> str:
+    """Format recorded spans as a Server-Timing header value (durations in milliseconds)."""
+    totals: Dict[str, float] = {}
+    for stage, elapsed in spans:
+        totals[stage] = totals.get(stage, 0.0) + elapsed
+    return ", ".join(f"{stage};dur={elapsed * 1000:.1f}" for stage, elapsed in totals.items())
+
+
+async def monitor_event_loop_lag(interval: float = 0.5) -> None:
+    """Measure how late a periodic sleep wakes up; blocking work on the loop shows up as lag."""
+    global _last_loop_lag
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        _last_loop_lag = max(0.0, loop.time() - start - interval)
+        event_loop_lag.observe((), _last_loop_lag)
+
+
+def render_metrics() -> str:
+    """
+    Render all metrics in the Prometheus text exposition format.
+
+    :return: Metrics text for the /metrics endpoint
+    """
+    lines: List[str] = []
+    for metric in (stage_duration, request_duration, requests_total, forecast_requests, event_loop_lag):
+        lines.extend(metric.render())
+
+    lines.append("# HELP rtsp_event_loop_lag_last_seconds Most recently measured event-loop lag.")
+    lines.append("# TYPE rtsp_event_loop_lag_last_seconds gauge")
+    lines.append(f"rtsp_event_loop_lag_last_seconds {_last_loop_lag}")
+
+    lines.append("# HELP rtsp_executor_queue_depth Work items waiting for a free executor thread.")
+    lines.append("# TYPE rtsp_executor_queue_depth gauge")
+    for name, executor in sorted(_executors.items()):
+        lines.append(f'rtsp_executor_queue_depth{{executor="{name}"}} {executor._work_queue.qsize()}')
+
+    stats = cache_stats()
+    cache_metrics = (
+        ("hits", "counter", "Cache hits."),
+        ("misses", "counter", "Cache misses."),
+        ("stale_hits", "counter", "Stale values served while revalidating."),
+        ("evictions", "counter", "Entries evicted for size or memory budget."),
+        ("entries", "gauge", "Entries currently cached."),
+        ("bytes", "gauge", "Estimated bytes currently cached."),
+    )
+    for field, kind, help_text in cache_metrics:
+        name = f"rtsp_cache_{field}_total" if kind == "counter" else f"rtsp_cache_{field}"
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for cache_name, cache in sorted(stats["caches"].items()):
+            lines.append(f'{name}{{cache="{cache_name}"}} {cache[field]}')
+
+    lines.append("# HELP rtsp_cache_budget_bytes Global cache memory budget.")
+    lines.append("# TYPE rtsp_cache_budget_bytes gauge")
+    lines.append(f"rtsp_cache_budget_bytes {stats['budget_bytes']}")
+    return "\n".join(lines) + "\n"
@@ -3,6 +3,7 @@ import os
 from typing import List, Dict
 import logging
 from dotenv import load_dotenv
+from utils.metrics import span
 
 logger = logging.getLogger(__name__)
 
@@ -37,7 +38,8 @@ def fetch_news(symbol: str, company_name: str) -> List[Dict]:
     logger.info(f"Fetching news for company: {company_name} (symbol: {symbol})")
     
     try:
-        response = requests.get(url, params=params)
+        with span("news_fetch"):
+            response = requests.get(url, params=params)
         response.raise_for_status()
         news_data = response.json()
         
@@ -3,13 +3,67 @@
 import plotly.graph_objects as go
 import plotly.utils
 import pandas as pd
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 import json
 import logging
+from utils.metrics import span
 
 logger = logging.getLogger(__name__)
 
-def generate_chart(stock_data: Dict[str, Any], chart_type: str = 'candlestick', period: str = '1mo') -> str:
+# Line styles for indicator overlays on the price axis
+OVERLAY_STYLES = {
+    'sma_20': dict(color='orange', width=1.5),
+    'sma_50': dict(color='purple', width=1.5),
+    'ema_12': dict(color='teal', width=1.5, dash='dash'),
+    'ema_26': dict(color='brown', width=1.5, dash='dash'),
+    'bb_upper': dict(color='rgba(128, 128, 128, 0.8)', width=1, dash='dot'),
+    'bb_lower': dict(color='rgba(128, 128, 128, 0.8)', width=1, dash='dot'),
+    'bb_middle': dict(color='rgba(128, 128, 128, 0.8)', width=1),
+    'vwap': dict(color='magenta', width=1.5),
+}
+
+def add_indicator_traces(fig: go.Figure, x, indicators: Dict[str, List[Optional[float]]]) -> List[str]:
+    """
+    Add indicator traces to the chart: moving averages, Bollinger bands and VWAP on the
+    price axis, RSI and MACD on their own panels (yaxis3, yaxis4, ...).
+
+    :return: Names of the oscillator panels added, bottom-most first
+    """
+    for name, style in OVERLAY_STYLES.items():
+        if name in indicators:
+            fig.add_trace(go.Scatter(
+                x=x,
+                y=indicators[name],
+                mode='lines',
+                name=name.upper(),
+                line=style,
+                # Shade the Bollinger band between the upper and lower lines
+                fill='tonexty' if name == 'bb_lower' and 'bb_upper' in indicators else None,
+                fillcolor='rgba(128, 128, 128, 0.1)'
+            ))
+
+    panels = []
+    if 'rsi_14' in indicators:
+        axis = f"y{3 + len(panels)}"
+        panels.append('RSI')
+        fig.add_trace(go.Scatter(x=x, y=indicators['rsi_14'], mode='lines', name='RSI (14)',
+                                 line=dict(color='darkorange', width=1.5), yaxis=axis))
+        for level in (30, 70):
+            fig.add_shape(type='line', xref='paper', x0=0, x1=1, yref=axis, y0=level, y1=level,
+                          line=dict(color='gray', width=1, dash='dot'))
+    if 'macd' in indicators:
+        axis = f"y{3 + len(panels)}"
+        panels.append('MACD')
+        fig.add_trace(go.Bar(x=x, y=indicators.get('macd_hist'), name='MACD Histogram', yaxis=axis,
+                             marker_color='rgba(100, 100, 100, 0.5)'))
+        fig.add_trace(go.Scatter(x=x, y=indicators['macd'], mode='lines', name='MACD',
+                                 line=dict(color='blue', width=1.5), yaxis=axis))
+        fig.add_trace(go.Scatter(x=x, y=indicators.get('macd_signal'), mode='lines', name='Signal',
+                                 line=dict(color='red', width=1.5), yaxis=axis))
+    return panels
+
+def generate_chart(stock_data: Dict[str, Any], chart_type: str = 'candlestick', period: str = '1mo',
+                   indicators: Optional[Dict[str, List[Optional[float]]]] = None) -> str:
     # Convert historical_data to DataFrame
     df = pd.DataFrame(stock_data['historical_data'])
     df['Date'] = pd.to_datetime(df['Date'], utc=True)
@@ -67,8 +121,16 @@ def generate_chart(stock_data: Dict[str, Any], chart_type: str = 'candlestick',
         hovermode='x unified'
     )
 
-    # Update y-axes to not share the same position
-    fig.update_layout(yaxis=dict(domain=[0.3, 1]), yaxis2=dict(domain=[0, 0.2]))
+    panels = add_indicator_traces(fig, df.index, indicators) if indicators else []
+
+    # Update y-axes to not share the same position; oscillator panels stack below the volume
+    offset = 0.17 * len(panels)
+    fig.update_layout(yaxis=dict(domain=[offset + 0.3 * (1 - offset), 1]),
+                      yaxis2=dict(domain=[offset, offset + 0.2 * (1 - offset)]))
+    for i, title in enumerate(panels):
+        fig.update_layout({f"yaxis{3 + i}": dict(title=title, domain=[0.17 * i, 0.17 * i + 0.13], anchor='x', showgrid=False)})
+    if panels:
+        fig.update_layout(height=600 + 150 * len(panels))
 
     # Add current price line
     fig.add_hline(
@@ -80,7 +142,8 @@ def generate_chart(stock_data: Dict[str, Any], chart_type: str = 'candlestick',
     )
 
     # Convert the figure to JSON string
-    chart_json = json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder)
+    with span("plotly_serialize"):
+        chart_json = json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder)
     return chart_json
 
 def generate_prediction_chart(prediction_data: Dict[str, Any], chart_type: str = 'line') -> str:
@@ -148,6 +211,7 @@ def generate_prediction_chart(prediction_data: Dict[str, Any], chart_type: str =
         hovermode='x unified'
     )
 
-    chart_json = json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder)
+    with span("plotly_serialize"):
+        chart_json = json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder)
     logger.info("Prediction chart generated successfully")
     return chart_json
@@ -1,87 +1,124 @@
 # utils/prediction.py
 
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Sequence, Tuple
 import pandas as pd
 from prophet import Prophet
 import logging
 from datetime import timedelta
-from utils.news_fetcher import fetch_news
-from utils.sentiment_analysis import get_overall_sentiment
+from utils.metrics import span
 
 logger = logging.getLogger(__name__)
 
+# Forecast adjustment per unit of sentiment score (1% per unit); see backtest/ for evaluating alternatives
+SENTIMENT_ADJUSTMENT = 0.01
+
+def make_prophet_model() -> Prophet:
+    """Prophet model configured as used for every forecast (and by the backtest engine)."""
+    return Prophet(daily_seasonality=True, weekly_seasonality=True, yearly_seasonality=True)
+
+def sentiment_adjustment_factor(score: float, sensitivity: float = SENTIMENT_ADJUSTMENT) -> float:
+    return 1 + score * sensitivity
+
+# Forecast grid (number of periods, frequency) for each forecast period
+FORECAST_GRIDS = {
+    '1d': (288, '5min'),  # 5-minute intervals for 1 day (288 * 5 minutes = 24 hours)
+    '1w': (672, '15min'),  # 15-minute intervals for 1 week (672 * 15 minutes = 7 days)
+    '1m': (720, 'H'),  # 1-hour intervals for 1 month (720 * 1 hour ≈ 30 days)
+    '3m': (90, 'D'),  # Daily intervals for 3 months
+    '6m': (180, 'D'),  # Daily intervals for 6 months
+}
+
+def fit_forecast_model(full_year_data: List[Dict[str, Any]], regressors: Sequence[str] = ()) -> Tuple[Prophet, pd.DataFrame, List[str]]:
+    """
+    Fit the Prophet model on historical closes; one fit can serve every forecast period.
+
+    :param full_year_data: List of dictionaries containing 1 year of historical stock data
+    :param regressors: Indicator series names to use as extra regressors (e.g., 'rsi_14')
+    :return: Fitted model, training frame and the regressors actually used
+    """
+    # Prepare data for Prophet
+    df = pd.DataFrame(full_year_data)
+    df['ds'] = pd.to_datetime(df['Date'], utc=True).dt.tz_localize(None)
+    df['y'] = df['Close'].astype(float)
+
+    # Initialize and fit the Prophet model
+    model = make_prophet_model()
+    regressors = [name for name in regressors if name in df and df[name].notna().any()]
+    for name in regressors:
+        # Warm-up bars have no indicator value yet; backfill them with the first one
+        df[name] = df[name].astype(float).bfill()
+        model.add_regressor(name)
+    with span("prophet_fit"):
+        model.fit(df)
+    return model, df, regressors
+
+def forecast_with_model(model: Prophet, df: pd.DataFrame, forecast_period: str, regressors: Sequence[str] = (),
+                        extra_periods: int = 0) -> Dict[str, Any]:
+    """
+    Forecast one period from a model fitted by fit_forecast_model.
+
+    :param extra_periods: Points to forecast beyond the period (used by the precompute job)
+    :return: Dictionary containing forecasted data
+    """
+    if forecast_period not in FORECAST_GRIDS:
+        raise ValueError(f"Unsupported forecast period: {forecast_period}")
+    periods, freq = FORECAST_GRIDS[forecast_period]
+
+    # Create future dates for forecasting
+    future = model.make_future_dataframe(periods=periods + extra_periods, freq=freq)
+    if regressors:
+        future = future.merge(df[['ds', *regressors]], on='ds', how='left')
+        future[list(regressors)] = future[list(regressors)].ffill()
+
+    # Make predictions
+    with span("prophet_predict"):
+        forecast = model.predict(future)
+
+    # Prepare the forecast data (only for the future dates)
+    last_historical_date = df['ds'].max()
+    forecast_data = forecast[forecast['ds'] > last_historical_date][['ds', 'yhat', 'yhat_lower', 'yhat_upper']].to_dict('records')
+
+    # Prepare data for Plotly
+    plotly_data = []
+    for i, row in enumerate(forecast_data):
+        plotly_data.append({
+            'Date': row['ds'].isoformat(),
+            'Open': forecast_data[max(0, i-1)]['yhat'],  # Use previous prediction as Open
+            'High': row['yhat_upper'],
+            'Low': row['yhat_lower'],
+            'Close': row['yhat'],
+            'Volume': None  # Prophet doesn't predict volume
+        })
+
+    logger.info(f"Generated forecast: {len(plotly_data)} data points")
+
+    return {
+        "forecast_data": plotly_data
+    }
+
 # Original predict_stock_price function
-def predict_stock_price(full_year_data: List[Dict[str, Any]], forecast_period: str) -> Dict[str, Any]:
+def predict_stock_price(full_year_data: List[Dict[str, Any]], forecast_period: str, regressors: Sequence[str] = ()) -> Dict[str, Any]:
     """
     Generate future stock price predictions using Prophet.
 
+    Indicator series present as columns of full_year_data (see fetch_year_data_for_prediction)
+    can be added as extra regressors; their last value is held flat over the forecast horizon.
+
     :param full_year_data: List of dictionaries containing 1 year of historical stock data
     :param forecast_period: String indicating the forecast period (e.g., '1d', '1w', '1m', '3m', '6m')
+    :param regressors: Indicator series names to use as extra regressors (e.g., 'rsi_14')
     :return: Dictionary containing forecasted data
     """
     logger.info(f"Starting prediction with {len(full_year_data)} historical data points for period: {forecast_period}")
     try:
-        # Prepare data for Prophet
-        df = pd.DataFrame(full_year_data)
-        df['ds'] = pd.to_datetime(df['Date'], utc=True).dt.tz_localize(None)
-        df['y'] = df['Close'].astype(float)
-        
-        # Initialize and fit the Prophet model
-        model = Prophet(daily_seasonality=True, weekly_seasonality=True, yearly_seasonality=True)
-        model.fit(df)
-        
-        # Determine forecast parameters based on the period
-        if forecast_period == '1d':
-            periods = 288  # 5-minute intervals for 1 day (288 * 5 minutes = 24 hours)
-            freq = '5min'
-        elif forecast_period == '1w':
-            periods = 672  # 15-minute intervals for 1 week (672 * 15 minutes = 7 days)
-            freq = '15min'
-        elif forecast_period == '1m':
-            periods = 720  # 1-hour intervals for 1 month (720 * 1 hour ≈ 30 days)
-            freq = 'H'
-        elif forecast_period == '3m':
-            periods = 90  # Daily intervals for 3 months
-            freq = 'D'
-        elif forecast_period == '6m':
-            periods = 180  # Daily intervals for 6 months
-            freq = 'D'
-        else:
-            raise ValueError(f"Unsupported forecast period: {forecast_period}")
-
-        # Create future dates for forecasting
-        future = model.make_future_dataframe(periods=periods, freq=freq)
-        
-        # Make predictions
-        forecast = model.predict(future)
-        
-        # Prepare the forecast data (only for the future dates)
-        last_historical_date = df['ds'].max()
-        forecast_data = forecast[forecast['ds'] > last_historical_date][['ds', 'yhat', 'yhat_lower', 'yhat_upper']].to_dict('records')
-        
-        # Prepare data for Plotly
-        plotly_data = []
-        for i, row in enumerate(forecast_data):
-            plotly_data.append({
-                'Date': row['ds'].isoformat(),
-                'Open': forecast_data[max(0, i-1)]['yhat'],  # Use previous prediction as Open
-                'High': row['yhat_upper'],
-                'Low': row['yhat_lower'],
-                'Close': row['yhat'],
-                'Volume': None  # Prophet doesn't predict volume
-            })
-        
-        logger.info(f"Generated forecast: {len(plotly_data)} data points")
-        
-        return {
-            "forecast_data": plotly_data
-        }
+        model, df, regressors = fit_forecast_model(full_year_data, regressors)
+        return forecast_with_model(model, df, forecast_period, regressors)
     except Exception as e:
         logger.error(f"Error in predict_stock_price: {str(e)}")
         return None
 
 # New function for sentiment-adjusted predictions
-def predict_stock_price_with_sentiment(full_year_data: List[Dict[str, Any]], forecast_period: str, symbol: str, company_name: str, sentiment_result: Dict[str, Any]) -> Dict[str, Any]:
+def predict_stock_price_with_sentiment(full_year_data: List[Dict[str, Any]], forecast_period: str, symbol: str, company_name: str, sentiment_result: Dict[str, Any], regressors: Sequence[str] = ()) -> Dict[str, Any]:
     """
     Generate future stock price predictions using Prophet and adjust based on sentiment analysis.
 
@@ -90,14 +127,24 @@ def predict_stock_price_with_sentiment(full_year_data: List[Dict[str, Any]], for
     :param symbol: Stock symbol
     :param company_name: Company name
     :param sentiment_result: Sentiment analysis result
+    :param regressors: Indicator series names to use as extra regressors
     :return: Dictionary containing forecasted data and sentiment information
     """
     # First, get the base prediction
-    prediction_data = predict_stock_price(full_year_data, forecast_period)
-    
-    if sentiment_result:
+    prediction_data = predict_stock_price(full_year_data, forecast_period, regressors)
+    return adjust_for_sentiment(prediction_data, sentiment_result)
+
+def adjust_for_sentiment(prediction_data: Dict[str, Any], sentiment_result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Scale a forecast by the sentiment adjustment factor.
+
+    :param prediction_data: Forecast from predict_stock_price (or the forecast store)
+    :param sentiment_result: Sentiment analysis result
+    :return: Dictionary containing the adjusted forecast and sentiment information
+    """
+    if prediction_data and sentiment_result:
         # Adjust predictions based on sentiment
-        adjustment_factor = 1 + (sentiment_result['score'] * 0.01)  # 1% adjustment per sentiment unit
+        adjustment_factor = sentiment_adjustment_factor(sentiment_result['score'])
         
         adjusted_forecast = []
         for data in prediction_data['forecast_data']:
@@ -108,7 +155,6 @@ def predict_stock_price_with_sentiment(full_year_data: List[Dict[str, Any]], for
             adjusted_data['Open'] *= adjustment_factor
             adjusted_forecast.append(adjusted_data)
         
-        prediction_data['forecast_data'] = adjusted_forecast
-        prediction_data['sentiment_result'] = sentiment_result
+        prediction_data = dict(prediction_data, forecast_data=adjusted_forecast, sentiment_result=sentiment_result)
     
     return prediction_data
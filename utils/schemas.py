@@ -2,11 +2,15 @@
 from pydantic import BaseModel, Field, validator
 from typing import List, Optional, Dict, Any
 
+from utils.indicators import INDICATOR_GROUPS, SERIES_NAMES
+
 
 class StockDataRequest(BaseModel):
     symbol: str
     duration: str = Field(..., description="Duration of historical data", example="1mo")
     chart_style: str = Field(..., description="Chart style", example="candlestick")
+    indicators: List[str] = Field(default_factory=list, description="Indicator overlays for the main chart", example=["sma_20", "rsi"])
+    regressors: List[str] = Field(default_factory=list, description="Indicator series used as extra prediction regressors", example=["rsi_14"])
 
     @validator('duration')
     def validate_duration(cls, v):
@@ -22,6 +26,18 @@ class StockDataRequest(BaseModel):
             raise ValueError(f"Invalid chart style. Must be one of {allowed_styles}")
         return v
 
+    @validator('indicators', each_item=True)
+    def validate_indicators(cls, v):
+        if v not in INDICATOR_GROUPS:
+            raise ValueError(f"Invalid indicator. Must be one of {list(INDICATOR_GROUPS)}")
+        return v
+
+    @validator('regressors', each_item=True)
+    def validate_regressors(cls, v):
+        if v not in SERIES_NAMES:
+            raise ValueError(f"Invalid regressor. Must be one of {list(SERIES_NAMES)}")
+        return v
+
 
 class StockData(BaseModel):
     symbol: str
@@ -59,7 +75,63 @@ class StockResponse(BaseModel):
     charts: Charts
     forecast: Optional[List[Dict[str, Any]]] = None
     sentiment_result: Optional[Dict[str, Any]] = None
+    freshness: Optional[Dict[str, Any]] = None
+    indicators: Optional[Dict[str, List[Optional[float]]]] = None
 
 
 class SymbolResponse(BaseModel):
     symbols: List[str]
+
+
+class SymbolMatch(BaseModel):
+    symbol: str
+    name: str
+
+
+class SymbolSearchResponse(BaseModel):
+    results: List[SymbolMatch]
+
+
+class CacheStats(BaseModel):
+    entries: int
+    bytes: int
+    max_bytes: int
+    ttl: float
+    hits: int
+    misses: int
+    stale_hits: int
+    evictions: int
+
+
+class CacheStatsResponse(BaseModel):
+    budget_bytes: int
+    used_bytes: int
+    caches: Dict[str, CacheStats]
+
+
+class ScreenerRow(BaseModel):
+    symbol: str
+    name: Optional[str] = None
+    last_close: Optional[float] = None
+    return_1d: Optional[float] = None
+    return_1w: Optional[float] = None
+    return_1m: Optional[float] = None
+    return_3m: Optional[float] = None
+    volatility: Optional[float] = None
+    high_52w: Optional[float] = None
+    low_52w: Optional[float] = None
+    distance_52w_high: Optional[float] = None
+    distance_52w_low: Optional[float] = None
+    avg_volume: Optional[float] = None
+    forecast_1d: Optional[float] = None
+    forecast_1w: Optional[float] = None
+    forecast_1m: Optional[float] = None
+    forecast_3m: Optional[float] = None
+    forecast_6m: Optional[float] = None
+
+
+class ScreenerResponse(BaseModel):
+    as_of: Optional[str] = None
+    universe: int
+    matched: int
+    results: List[ScreenerRow]
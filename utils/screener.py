@@ -0,0 +1,265 @@
+# utils/screener.py
+
+import os
+import time
+import asyncio
+import functools
+import logging
+import threading
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from utils.cache import SizedTTLCache
+from utils.data_fetcher import year_data_cache, fetch_year_bars, YEAR_DATA_TTL
+from utils.forecast_store import forecast_store
+from utils.metrics import span
+from utils import symbols
+
+logger = logging.getLogger(__name__)
+
+# Rebuild the matrix at most this often when the cached daily history has changed (in seconds)
+SCREENER_REBUILD_INTERVAL = float(os.getenv("SCREENER_REBUILD_INTERVAL", "30"))
+# Keep the daily history of every registry symbol cached so the screener covers the whole universe.
+# Opt-in: enable it on the instance that serves the screener, not in every worker.
+SCREENER_WARM_UNIVERSE = os.getenv("SCREENER_WARM_UNIVERSE", "0") == "1"
+
+DAY_NS = 86_400 * 10 ** 9
+SESSIONS_PER_YEAR = 252
+# Sessions back for each trailing return
+RETURN_WINDOWS = {"return_1d": 1, "return_1w": 5, "return_1m": 21, "return_3m": 63}
+VOLATILITY_WINDOW = 63
+VOLUME_WINDOW = 20
+FORECAST_HORIZONS = ("1d", "1w", "1m", "3m", "6m")
+
+METRICS = (
+    "last_close", *RETURN_WINDOWS, "volatility", "high_52w", "low_52w", "distance_52w_high",
+    "distance_52w_low", "avg_volume", *(f"forecast_{h}" for h in FORECAST_HORIZONS),
+)
+
+# Latest live forecast per (symbol, horizon) as (made_at, % change vs. the last close)
+forecast_deltas = SizedTTLCache("forecast_deltas", max_bytes=1024 * 1024, ttl=86400)
+
+
+def record_forecast(symbol: str, horizon: str, last_close: float, forecast_close: float) -> None:
+    """
+    Record the latest forecast for a symbol so the screener can rank by expected change.
+
+    :param symbol: Stock symbol
+    :param horizon: Forecast period ('1d', '1w', '1m', '3m' or '6m')
+    :param last_close: Close the forecast starts from
+    :param forecast_close: Forecast close at the end of the horizon
+    """
+    if horizon in FORECAST_HORIZONS and last_close:
+        forecast_deltas[(symbol, horizon)] = (time.time(), 100.0 * (forecast_close / last_close - 1.0))
+
+
+def latest_forecast_deltas() -> Dict[Tuple[str, str], float]:
+    """Forecast change per (symbol, horizon) from the most recently made forecast, live or precomputed."""
+    latest = forecast_store.deltas()
+    for key, (made_at, delta) in forecast_deltas.snapshot().items():
+        if key not in latest or made_at > latest[key][0]:
+            latest[key] = (made_at, delta)
+    return {key: delta for key, (_, delta) in latest.items()}
+
+
+class PriceMatrix:
+    """
+    Aligned (symbols x sessions) close and volume matrices with per-symbol metrics.
+
+    Sessions missing for a symbol are NaN. Metrics are computed once per build with
+    vectorized operations; queries only filter and sort the resulting columns.
+    """
+
+    def __init__(self, entries: Dict[str, Any], deltas: Dict[Tuple[str, str], float]):
+        self.symbols: List[str] = sorted(entries)
+        self.built_at = time.time()
+
+        # Session day numbers; shifting by 12 hours maps midnight bars in any US/EU/Asia timezone to their own date
+        days = {symbol: (entries[symbol].timestamps + DAY_NS // 2) // DAY_NS for symbol in self.symbols}
+        self.days = np.unique(np.concatenate(list(days.values()))) if days else np.empty(0, dtype=np.int64)
+        self.close = np.full((len(self.symbols), len(self.days)), np.nan, dtype=np.float32)
+        self.volume = np.full((len(self.symbols), len(self.days)), np.nan, dtype=np.float32)
+        for i, symbol in enumerate(self.symbols):
+            columns = np.searchsorted(self.days, days[symbol])
+            self.close[i, columns] = entries[symbol].close
+            self.volume[i, columns] = entries[symbol].volume
+
+        self.metrics = self._compute(deltas)
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def _compute(self, deltas: Dict[Tuple[str, str], float]) -> Dict[str, np.ndarray]:
+        n = len(self.symbols)
+        metrics: Dict[str, np.ndarray] = {}
+        if not n or not len(self.days):
+            return {name: np.full(n, np.nan) for name in METRICS}
+
+        close = self.close.astype(np.float64)
+        # Carry the last close forward over sessions a symbol did not trade, so returns span sessions
+        filled = close.copy()
+        valid = ~np.isnan(filled)
+        index = np.where(valid, np.arange(filled.shape[1]), 0)
+        np.maximum.accumulate(index, axis=1, out=index)
+        filled = filled[np.arange(n)[:, None], index]
+
+        last = filled[:, -1]
+        metrics["last_close"] = last
+        with np.errstate(invalid="ignore", divide="ignore"), warnings.catch_warnings():
+            # Symbols without data in a window yield NaN metrics, not warnings
+            warnings.simplefilter("ignore", RuntimeWarning)
+            for name, window in RETURN_WINDOWS.items():
+                base = filled[:, -window - 1] if filled.shape[1] > window else np.full(n, np.nan)
+                metrics[name] = 100.0 * (last / base - 1.0)
+
+            log_returns = np.diff(np.log(filled[:, -VOLATILITY_WINDOW - 1:]), axis=1)
+            metrics["volatility"] = 100.0 * np.nanstd(log_returns, axis=1, ddof=1) * np.sqrt(SESSIONS_PER_YEAR)
+
+            year = close[:, -SESSIONS_PER_YEAR:]
+            metrics["high_52w"] = np.nanmax(year, axis=1)
+            metrics["low_52w"] = np.nanmin(year, axis=1)
+            metrics["distance_52w_high"] = 100.0 * (last / metrics["high_52w"] - 1.0)
+            metrics["distance_52w_low"] = 100.0 * (last / metrics["low_52w"] - 1.0)
+            metrics["avg_volume"] = np.nanmean(self.volume[:, -VOLUME_WINDOW:].astype(np.float64), axis=1)
+
+        for horizon in FORECAST_HORIZONS:
+            metrics[f"forecast_{horizon}"] = np.array(
+                [deltas.get((symbol, horizon), np.nan) for symbol in self.symbols], dtype=np.float64
+            )
+        return metrics
+
+    def query(self, sort: str = "return_1d", descending: bool = True, filters: Sequence[Tuple[str, str, float]] = (),
+              limit: int = 50) -> Tuple[int, List[Dict[str, Any]]]:
+        """
+        Filter and rank the universe.
+
+        :param sort: Metric to sort by (NaNs last)
+        :param descending: Sort order
+        :param filters: (metric, operator, value) conditions, all of which must hold
+        :param limit: Maximum number of rows
+        :return: Number of matching symbols and the top rows
+        """
+        mask = np.ones(len(self.symbols), dtype=bool)
+        with np.errstate(invalid="ignore"):
+            for metric, op, value in filters:
+                mask &= OPERATORS[op](self.metrics[metric], value)
+        candidates = np.flatnonzero(mask)
+
+        keys = self.metrics[sort][candidates]
+        keys = np.where(np.isnan(keys), np.inf, -keys if descending else keys)
+        order = candidates[np.argsort(keys, kind="stable")[:limit]]
+
+        columns = {name: self.metrics[name][order].round(4).tolist() for name in METRICS}
+        rows = [{"symbol": self.symbols[i]} for i in order]
+        for name, values in columns.items():
+            for row, value in zip(rows, values):
+                row[name] = None if value != value else value
+        return len(candidates), rows
+
+
+OPERATORS = {
+    ">": np.greater,
+    ">=": np.greater_equal,
+    "<": np.less,
+    "<=": np.less_equal,
+}
+
+
+def parse_filter(expression: str) -> Tuple[str, str, float]:
+    """
+    Parse a filter such as "return_1m>5" or "volatility<=30".
+
+    :raises ValueError: If the metric, operator or value is invalid
+    """
+    for op in (">=", "<=", ">", "<"):
+        metric, found, value = expression.partition(op)
+        if found:
+            metric = metric.strip()
+            if metric not in METRICS:
+                raise ValueError(f"Unknown metric '{metric}'. Must be one of {list(METRICS)}")
+            return metric, op, float(value)
+    raise ValueError(f"Invalid filter '{expression}'. Expected <metric><op><value> with op one of {list(OPERATORS)}")
+
+
+_matrix: Optional[PriceMatrix] = None
+_fingerprint: Optional[Tuple] = None
+_build_lock = threading.Lock()
+
+
+def get_matrix() -> PriceMatrix:
+    """
+    Return the price matrix, rebuilding it from the daily history cache when that has
+    changed and the current matrix is older than SCREENER_REBUILD_INTERVAL.
+    """
+    global _matrix, _fingerprint
+    if _matrix is not None and time.time() - _matrix.built_at < SCREENER_REBUILD_INTERVAL:
+        return _matrix
+    with _build_lock:
+        if _matrix is not None and time.time() - _matrix.built_at < SCREENER_REBUILD_INTERVAL:
+            return _matrix
+        entries = {key[0]: (bars, fetched_at) for key, (bars, fetched_at) in year_data_cache.snapshot().items() if len(bars)}
+        deltas = latest_forecast_deltas()
+        fingerprint = (tuple(sorted((symbol, fetched_at) for symbol, (_, fetched_at) in entries.items())),
+                       tuple(sorted(deltas.items())))
+        if _matrix is None or fingerprint != _fingerprint:
+            with span("screener_build"):
+                _matrix = PriceMatrix({symbol: bars for symbol, (bars, _) in entries.items()}, deltas)
+            _fingerprint = fingerprint
+            logger.info(f"Built screener matrix: {len(_matrix)} symbols x {len(_matrix.days)} sessions")
+        else:
+            _matrix.built_at = time.time()
+        return _matrix
+
+
+def screen(sort: str = "return_1d", descending: bool = True, filters: Sequence[str] = (), limit: int = 50) -> Dict[str, Any]:
+    """
+    Screen the S&P 500 universe from the cached daily history.
+
+    :param sort: Metric to sort by
+    :param descending: Sort order
+    :param filters: Filter expressions, e.g. ["return_1m>5", "volatility<30"]
+    :param limit: Maximum number of rows
+    :return: Dictionary with as_of, universe, matched and results
+    :raises ValueError: On an unknown sort metric or invalid filter
+    """
+    if sort not in METRICS:
+        raise ValueError(f"Unknown sort metric '{sort}'. Must be one of {list(METRICS)}")
+    conditions = [parse_filter(expression) for expression in filters]
+    matrix = get_matrix()
+    matched, rows = matrix.query(sort, descending, conditions, limit)
+    for row in rows:
+        row["name"] = symbols.registry.name_of(row["symbol"])
+    as_of = None
+    if len(matrix.days):
+        as_of = np.datetime64(int(matrix.days[-1]), "D").astype(str)
+    return {"as_of": as_of, "universe": len(matrix), "matched": matched, "results": rows}
+
+
+async def warm_universe_periodically(interval: float = 0.8 * YEAR_DATA_TTL) -> None:
+    """
+    Background task keeping the daily history of every registry symbol cached.
+
+    Each pass visits the universe once, spread evenly over `interval` seconds, and
+    refreshes entries older than half the interval on its own single thread, so the
+    warmer never floods upstream or the shared revalidation pool. With the default
+    interval entries are refreshed before they turn stale.
+    """
+    loop = asyncio.get_running_loop()
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="warm")
+
+    while True:
+        start = time.time()
+        universe = list(symbols.registry.symbols)
+        pace = interval / max(1, len(universe))
+        refreshed = 0
+        for i, symbol in enumerate(universe):
+            try:
+                refreshed += await loop.run_in_executor(executor, functools.partial(
+                    fetch_year_bars.prefetch, symbol, max_age=interval / 2))
+            except Exception as e:
+                logger.error(f"Error warming daily history for {symbol}: {e}")
+            await asyncio.sleep(max(0.0, start + (i + 1) * pace - time.time()))
+        logger.info(f"Warmed daily history for {len(universe)} symbols ({refreshed} refreshed) in {time.time() - start:.1f}s")
@@ -7,6 +7,7 @@ import re
 from transformers import AutoTokenizer, AutoModelForSequenceClassification
 import torch
 from typing import List, Dict, Any
+from utils.metrics import span
 
 logger = logging.getLogger(__name__)
 
@@ -71,10 +72,11 @@ def preprocess_text(text: str) -> str:
     return text
 
 def analyze_sentiment(texts: List[str]) -> List[Dict[str, float]]:
-    inputs = tokenizer(texts, padding=True, truncation=True, return_tensors="pt", max_length=512)
-    
-    with torch.no_grad():
-        outputs = model(**inputs)
+    with span("finbert"):
+        inputs = tokenizer(texts, padding=True, truncation=True, return_tensors="pt", max_length=512)
+
+        with torch.no_grad():
+            outputs = model(**inputs)
     
     scores = torch.nn.functional.softmax(outputs.logits, dim=-1)
     labels = ['neutral', 'positive', 'negative']
@@ -1,23 +1,168 @@
 # utils/symbols.py
 
-import httpx
-import pandas as pd
-from cachetools import TTLCache
+import os
+import json
+import bisect
+import asyncio
 import logging
-from typing import List
 from io import StringIO
-import asyncio
+from typing import Dict, List, Optional, Set, Tuple
+
+import httpx
+import pandas as pd
 
 logger = logging.getLogger(__name__)
 
-# Create a cache for symbols with a TTL of 24 hours (86400 seconds)
-symbol_cache = TTLCache(maxsize=1, ttl=86400)
+# Snapshot bundled with the repository, used until a refresh from Wikipedia succeeds
+BUNDLED_SNAPSHOT_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "sp500_symbols.json")
+# Snapshot written after each successful refresh, preferred over the bundled one at startup
+SYMBOLS_CACHE_PATH = os.getenv("SYMBOLS_CACHE_PATH", os.path.join("data", "sp500_symbols.cache.json"))
+# Refresh the symbol list from Wikipedia every 24 hours
+SYMBOLS_REFRESH_INTERVAL = 86400
+# A scrape returning fewer symbols than this is treated as broken and ignored
+MIN_EXPECTED_SYMBOLS = 400
+
 
-async def fetch_sp500_symbols() -> List[str]:
+def _trigrams(text: str) -> Set[str]:
+    padded = f"  {text.lower()} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SymbolRegistry:
     """
-    Fetch the list of S&P 500 stock symbols from Wikipedia.
+    Immutable, indexed set of ticker symbols and company names.
 
-    :return: List of stock symbols
+    Validation is a hashed set lookup; search combines sorted prefix indexes over
+    tickers and name words with a trigram index for fuzzy matches.
+    """
+
+    def __init__(self, entries: List[Tuple[str, str]]):
+        entries = sorted({symbol: name for symbol, name in entries}.items())
+        self.symbols: List[str] = [symbol for symbol, _ in entries]
+        self.names: List[str] = [name for _, name in entries]
+        self.symbol_set = frozenset(self.symbols)
+
+        # Sorted (token, id) pairs for bisect-based prefix lookup
+        self.ticker_prefixes: List[Tuple[str, int]] = sorted((symbol.lower(), i) for i, symbol in enumerate(self.symbols))
+        self.word_prefixes: List[Tuple[str, int]] = sorted(
+            (word, i) for i, name in enumerate(self.names) for word in set(name.lower().replace("-", " ").split())
+        )
+
+        self.trigrams: Dict[str, Set[int]] = {}
+        self.entry_trigrams: List[Set[str]] = []
+        for i, (symbol, name) in enumerate(entries):
+            grams = _trigrams(symbol) | _trigrams(name)
+            self.entry_trigrams.append(grams)
+            for gram in grams:
+                self.trigrams.setdefault(gram, set()).add(i)
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self.symbol_set
+
+    def name_of(self, symbol: str) -> Optional[str]:
+        i = bisect.bisect_left(self.symbols, symbol)
+        return self.names[i] if i < len(self.symbols) and self.symbols[i] == symbol else None
+
+    @staticmethod
+    def _prefix_ids(index: List[Tuple[str, int]], prefix: str) -> List[int]:
+        start = bisect.bisect_left(index, (prefix, -1))
+        ids = []
+        for token, i in index[start:]:
+            if not token.startswith(prefix):
+                break
+            ids.append(i)
+        return ids
+
+    def search(self, query: str, limit: int = 10) -> List[Dict[str, str]]:
+        """
+        Rank symbols for an autocomplete query.
+
+        Exact ticker matches come first, then ticker prefixes, company-name word
+        prefixes and finally trigram (fuzzy) matches on ticker and name.
+
+        :param query: Partial ticker or company name
+        :param limit: Maximum number of results
+        :return: List of {"symbol", "name"} dictionaries
+        """
+        q = query.strip().lower()
+        if not q:
+            return []
+
+        scores: Dict[int, float] = {}
+        for i in self._prefix_ids(self.ticker_prefixes, q):
+            scores[i] = 3.0 if self.symbols[i].lower() == q else 2.0 + 1.0 / len(self.symbols[i])
+        for i in self._prefix_ids(self.word_prefixes, q):
+            scores.setdefault(i, 1.5)
+
+        if len(scores) < limit and len(q) >= 3:
+            grams = _trigrams(q)
+            candidates: Dict[int, int] = {}
+            for gram in grams:
+                for i in self.trigrams.get(gram, ()):
+                    candidates[i] = candidates.get(i, 0) + 1
+            for i, shared in candidates.items():
+                # Fraction of the query's trigrams found in the entry
+                similarity = shared / len(grams)
+                if similarity >= 0.5:
+                    scores.setdefault(i, similarity)
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], self.symbols[item[0]]))[:limit]
+        return [{"symbol": self.symbols[i], "name": self.names[i]} for i, _ in ranked]
+
+
+def load_snapshot(path: str) -> Optional[SymbolRegistry]:
+    """
+    Load a symbol snapshot from disk.
+
+    :param path: Path of a JSON snapshot with a "symbols" list of {"symbol", "name"}
+    :return: SymbolRegistry, or None if the file is missing or invalid
+    """
+    try:
+        with open(path, "r") as f:
+            snapshot = json.load(f)
+        registry = SymbolRegistry([(entry["symbol"], entry["name"]) for entry in snapshot["symbols"]])
+        logger.info(f"Loaded {len(registry)} symbols from {path}")
+        return registry
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.error(f"Error loading symbol snapshot {path}: {e}")
+        return None
+
+
+def save_snapshot(registry: SymbolRegistry, path: str) -> None:
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"symbols": [{"symbol": s, "name": n} for s, n in zip(registry.symbols, registry.names)]}, f)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        logger.error(f"Error saving symbol snapshot {path}: {e}")
+
+
+# Loaded at import so startup and the first request never depend on Wikipedia
+registry: SymbolRegistry = load_snapshot(SYMBOLS_CACHE_PATH) or load_snapshot(BUNDLED_SNAPSHOT_PATH) or SymbolRegistry([])
+if not len(registry):
+    logger.error("No symbol snapshot available; all symbols will be rejected until a refresh succeeds.")
+
+
+def parse_sp500_table(html: str) -> List[Tuple[str, str]]:
+    """Parse (symbol, company name) pairs from the Wikipedia S&P 500 page."""
+    tables = pd.read_html(StringIO(html))
+    df = tables[0]  # The first table typically contains the symbols
+    # Clean symbols by replacing '.' with '-' to match yfinance formatting
+    return [(symbol.replace('.', '-'), name) for symbol, name in zip(df['Symbol'], df['Security'])]
+
+
+async def fetch_sp500_symbols() -> List[Tuple[str, str]]:
+    """
+    Fetch the list of S&P 500 stock symbols and company names from Wikipedia.
+
+    :return: List of (symbol, company name) tuples
     """
     url = "https://en.wikipedia.org/wiki/List_of_S%26P_500_companies"
     logger.info("Fetching S&P 500 symbols from Wikipedia.")
@@ -25,28 +170,62 @@ async def fetch_sp500_symbols() -> List[str]:
         try:
             response = await client.get(url, timeout=10.0)
             response.raise_for_status()
-            html_content = StringIO(response.text)
-            tables = pd.read_html(html_content)
-            df = tables[0]  # The first table typically contains the symbols
-            symbols = df['Symbol'].tolist()
-            # Clean symbols by replacing '.' with '-' to match yfinance formatting
-            symbols = [symbol.replace('.', '-') for symbol in symbols]
+            # Parsing the whole page is CPU work; keep it off the event loop
+            symbols = await asyncio.get_running_loop().run_in_executor(None, parse_sp500_table, response.text)
             logger.info(f"Fetched and cleaned {len(symbols)} symbols.")
             return symbols
         except Exception as e:
             logger.error(f"Error fetching S&P 500 symbols: {e}")
             return []
 
+
+async def refresh_symbols() -> bool:
+    """
+    Refresh the registry from Wikipedia and persist it, keeping the current one on failure.
+
+    :return: True if the registry was replaced
+    """
+    global registry
+    entries = await fetch_sp500_symbols()
+    if len(entries) < MIN_EXPECTED_SYMBOLS:
+        logger.warning(f"Symbol refresh returned {len(entries)} symbols; keeping the current {len(registry)}.")
+        return False
+    # Index construction is CPU work; keep it off the event loop
+    refreshed = await asyncio.get_running_loop().run_in_executor(None, SymbolRegistry, entries)
+    registry = refreshed
+    await asyncio.get_running_loop().run_in_executor(None, save_snapshot, refreshed, SYMBOLS_CACHE_PATH)
+    return True
+
+
+async def refresh_symbols_periodically(interval: float = SYMBOLS_REFRESH_INTERVAL) -> None:
+    """Background task refreshing the registry now and then every `interval` seconds."""
+    while True:
+        try:
+            await refresh_symbols()
+        except Exception as e:
+            logger.error(f"Error refreshing symbols: {e}")
+        await asyncio.sleep(interval)
+
+
 async def get_sp500_symbols() -> List[str]:
     """
-    Get and cache the list of S&P 500 stock symbols.
+    Get the list of S&P 500 stock symbols from the registry.
 
     :return: List of stock symbols
     """
-    if 'symbols' not in symbol_cache:
-        symbols = await fetch_sp500_symbols()
-        symbol_cache['symbols'] = symbols
-    return symbol_cache['symbols']
+    return registry.symbols
+
+
+def search_symbols(query: str, limit: int = 10) -> List[Dict[str, str]]:
+    """
+    Search tickers and company names for autocomplete.
+
+    :param query: Partial ticker or company name
+    :param limit: Maximum number of results
+    :return: List of {"symbol", "name"} dictionaries
+    """
+    return registry.search(query, limit)
+
 
 def is_valid_symbol(symbol: str) -> bool:
     """
@@ -55,9 +234,4 @@ def is_valid_symbol(symbol: str) -> bool:
     :param symbol: Stock symbol to validate
     :return: True if valid, False otherwise
     """
-    symbols = symbol_cache.get('symbols')
-    if not symbols:
-        # If cache miss, return True to allow the symbol (we'll validate it later)
-        logger.warning("Symbol cache is empty. Cannot validate symbols accurately.")
-        return True
-    return symbol in symbols
+    return symbol in registry